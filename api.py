@@ -1,25 +1,21 @@
-import cv2
 import json
 from kafka_config.kafka_config import KafkaListener
-from kafka_config.kafka_config import KafkaMessenger
-from processes.pacoteTracker import PacoteTracker
-from processes.palletTracker import PalletTracker
-from processes.stretchTracker import StretchTracker
-from processes.startTracker import StartTracker
-from processes.macacaoTracker import MacacaoTracker
-from processes.finishTracker import FinishTracker
-from processes.labelPolpaTracker import LabelPolpaTracker
-from processes.pacotePolpaTracker import PacotePolpaTracker
+from procedure_config.procedure_config import (
+    ProcedureConfig,
+    TRACKER_MODELS,
+    VIDEO_PATH_VARS,
+)
 from pg_config.pg_config import ProcedimentoManager
+from model_config.model_registry import ModelRegistry
 from datetime import datetime
-from video_config.video_capture_v2 import VideoCapture
+from video_config.camera_manager import CameraManager
+from video_config.stream_hub import StreamHub
 from dotenv import load_dotenv
 import os
 from flask import Flask, Response, request
 from threading import Thread, Lock
-from queue import Queue, Empty
-import time
-import serial
+from queue import SimpleQueue, Empty
+from collections import deque
 from flask_cors import CORS, cross_origin
 import logging
 import torch
@@ -44,103 +40,94 @@ app = Flask(__name__)
 cors = CORS(app)
 app.config["CORS_HEADERS"] = "Content-Type"
 
-# Buffer para armazenar os frames processados para o streaming
-frame_buffer = Queue(maxsize=10000)
-frame_lock = Lock()
-
 # Cria a pasta de gravações se não existir
 if not os.path.exists("recordings"):
     os.makedirs("recordings")
 
 # --- CLASSES DE MANIPULAÇÃO DE ESTADO ---
 
-class SkipHandler:
-    isSkipped = False
-    skipJustification = ''
+class SessionControl:
+    """
+    Canal de comandos thread-safe de uma sessão de procedimento.
+    A rota /skip_step e os listeners Kafka (cancelamento, etiquetas) postam
+    comandos; o frame_process da sessão os consome sem consultar estado global.
+    """
 
-    @classmethod
-    def get_isSkipped_value(cls):
-        return cls.isSkipped
+    SKIP = "skip"
+    CANCEL = "cancel"
+    ETIQUETA = "etiqueta"
 
-    @classmethod
-    def set_isSkipped_value(cls, new_isSkipped_value):
-        cls.isSkipped = new_isSkipped_value
+    def __init__(self):
+        self._commands = SimpleQueue()
 
-    @classmethod
-    def reset_isSkipped_value(cls):
-        cls.isSkipped = False
-    
-    @classmethod
-    def get_skipJustification_value(cls):
-        return cls.skipJustification
-    
-    @classmethod
-    def set_skipJustification_value(cls, newSkipJustificationValue):
-        cls.skipJustification = newSkipJustificationValue
-    
-    @classmethod
-    def reset_skipJustification_value(cls):
-        cls.skipJustification = ''
+    def post(self, command, value=None):
+        self._commands.put((command, value))
 
-class CancelHandler:
-    isCanceled = False
+    def skip(self, justification):
+        self.post(self.SKIP, justification)
 
-    @classmethod
-    def get_isCanceled_value(cls):
-        return cls.isCanceled
+    def cancel(self):
+        self.post(self.CANCEL)
 
-    @classmethod
-    def set_isCanceled_value(cls, new_isCanceled_value):
-        cls.isCanceled = new_isCanceled_value
+    def etiqueta(self, valor_etiqueta):
+        self.post(self.ETIQUETA, valor_etiqueta)
 
+    def drain(self):
+        """Retorna (e remove) todos os comandos pendentes, em ordem de chegada."""
+        commands = []
+        while not self._commands.empty():
+            try:
+                commands.append(self._commands.get_nowait())
+            except Empty:
+                break
+        return commands
 
-class EtiquetaHandler:
-    quantidade_etiqueta = 0
-    valor_etiqueta = None
 
-    @classmethod
-    def set_valor_etiqueta(cls, new_valor_etiqueta):
-        cls.valor_etiqueta = new_valor_etiqueta
+# --- CLASSE PRINCIPAL DE ORQUESTRAÇÃO ---
 
-    @classmethod
-    def set_quantidade_etiqueta(cls, new_quantidade_etiqueta):
-        cls.quantidade_etiqueta += new_quantidade_etiqueta
+# Passos que não fazem nada para certas configurações do procedimento
+# (tracker -> predicado sobre o plano). São removidos da ordem de execução
+# ao iniciar o procedimento: o tracker não é criado e a câmera não é trocada,
+# e o passo é gravado como aprovado (skipped_result) para não anular o status geral.
+NOOP_STEPS = {
+    "MacacaoTracker": lambda plan: plan.expected_macacao_color == "macacao_branco",
+}
 
-    @classmethod
-    def get_valor_etiqueta(cls):
-        return cls.valor_etiqueta
 
-    @classmethod
-    def get_quantidade_etiqueta(cls):
-        return cls.quantidade_etiqueta
+MODEL_PATHS = {
+    "rede1": os.getenv("MODEL_REDE1"),
+    "rede2": os.getenv("MODEL_REDE2"),
+    "rede3": os.getenv("MODEL_REDE3"),
+    "rede4": os.getenv("MODEL_REDE4"),
+    "rede5": os.getenv("MODEL_REDE5"),
+    "rede6": os.getenv("MODEL_REDE6"),
+}
 
-    @classmethod
-    def set_quantidade_etiqueta_zero(cls):
-        cls.quantidade_etiqueta = 0
 
+class InspectProcedure:
+    """Sessão de um procedimento: estado próprio, modelos e câmeras compartilhados pelo processo."""
 
-# --- CLASSE PRINCIPAL DE ORQUESTRAÇÃO ---
+    def __init__(self, video_paths=None, dock=None):
+        self.video_paths = self.resolve_video_paths(video_paths)
+        self.video_path = self.video_paths["VIDEO_PATH_START"]
 
+        # Hub de broadcast dos frames processados da doca: buffer latest-N de tamanho fixo
+        # (DISPLAY_BUFFER_SIZE), codifica cada frame uma vez e atende qualquer número de clientes
+        self.dock = dock
+        self.stream_hub = StreamHub.for_dock(dock)
 
-class InspectProcedure:
-    def __init__(self):
-        self.video_path = os.getenv("VIDEO_PATH_START")
-
-        with open(os.getenv("JSON_PATH"), "r", encoding="utf-8") as file:
-            self.procedures_json = json.load(file)
-
-        self.model_paths = {
-            "rede1": os.getenv("MODEL_REDE1"),
-            "rede2": os.getenv("MODEL_REDE2"),
-            "rede3": os.getenv("MODEL_REDE3"),
-            "rede4": os.getenv("MODEL_REDE4"),
-            "rede5": os.getenv("MODEL_REDE5"),
-            "rede6": os.getenv("MODEL_REDE6"),
-        }
+        # Procedimentos validados e compilados uma vez por processo (JSON_PATH)
+        self.procedures = ProcedureConfig.load()
+        self.plan = None
 
-        self.expected_color = None
-        self.expected_pallet_class = None
-        self.expected_macacao_color = None
+        self.model_paths = MODEL_PATHS
+        self.preload_resources(self.video_paths.values())
+
+
+        # Canal de comandos (skip/cancelamento/etiquetas) e estado de etiquetas da sessão
+        self.control = SessionControl()
+        self.valor_etiqueta = None
+        self.quantidade_etiqueta = 0
 
         self.alerta_total = ""
         self.obs = ""
@@ -148,206 +135,183 @@ class InspectProcedure:
         self.timestamp_inicio = None
         self.timestamp_fim = None
 
-        self.tracker_order = []
+        self.tracker_order = []  # ProcedureSteps a executar, na ordem do plano
+        self.tracker_results = {}  # {tracker: {campo de RESULT_FIELDS: valor}}
         self.tracker_index = -1
         self.current_tracker = None  # Nenhum tracker carregado inicialmente
+        self.finished = False
 
-        self.video_capture = VideoCapture(self.video_path, self.frame_process)
+        # Decodificadores persistentes e compartilhados; trocar de tracker só troca o stream ativo
+        self.video_capture = CameraManager(self.frame_process)
 
-    def create_tracker_by_name(self, tracker_name):
-        """Cria uma instância do tracker com base no seu nome (string)."""
-        logging.info(f"[GPU Manager] Carregando modelo para: {tracker_name}")
-        if tracker_name == "StartTracker":
-            return StartTracker(self.model_paths["rede1"])
-        elif tracker_name == "MacacaoTracker":
-            return MacacaoTracker(
-                self.model_paths["rede3"], self.expected_macacao_color
-            )
-        elif tracker_name == "PalletTracker":
-            return PalletTracker(
-                self.model_paths["rede2"],
-                self.expected_color,
-                self.expected_pallet_class,
-            )
-        elif tracker_name == "PacoteTracker":
-            return PacoteTracker(self.model_paths["rede1"], self.current_procedure)
-        elif tracker_name == "StretchTracker":
-            return StretchTracker(self.model_paths["rede4"])
-        elif tracker_name == "FinishTracker":
-            return FinishTracker(self.model_paths["rede1"])
-        elif tracker_name == "LabelPolpaTracker":
-            return LabelPolpaTracker(self.model_paths["rede6"])
-        elif tracker_name == "PacotePolpaTracker":
-            return PacotePolpaTracker(self.model_paths["rede1"])
-        else:
-            raise ValueError(f"Tracker desconhecido: {tracker_name}")
+    @staticmethod
+    def resolve_video_paths(video_paths=None):
+        """Câmeras por variável VIDEO_PATH_*; a mensagem do procedimento pode sobrescrevê-las (ex.: outra doca)."""
+        resolved = {
+            name: os.getenv(name)
+            for name in list(VIDEO_PATH_VARS.values()) + ["VIDEO_PATH_DEFAULT"]
+        }
+        resolved.update(video_paths or {})
+        return resolved
+
+    @staticmethod
+    def camera_urls(video_paths=None):
+        """Conjunto das câmeras que uma sessão com esses `video_paths` pode usar."""
+        return {url for url in InspectProcedure.resolve_video_paths(video_paths).values() if url}
+
+    @staticmethod
+    def preload_resources(video_paths):
+        """
+        Pré-carrega (e aquece) os modelos usados pelos trackers e abre as câmeras.
+        Idempotente: após a primeira chamada no processo o custo é desprezível.
+        """
+        InspectProcedure.preload_models()
+        CameraManager(None).preload(video_paths)
+
+    @staticmethod
+    def preload_models():
+        """Pré-carrega (e aquece) os modelos usados pelos trackers."""
+        ModelRegistry.preload(MODEL_PATHS[rede] for rede in set(TRACKER_MODELS.values()))
+
+    def create_tracker(self, step):
+        """Cria o tracker de um passo do plano com o modelo e os parâmetros compilados do passo."""
+        logging.info(f"[GPU Manager] Iniciando tracker: {step.name}")
+        model_path = self.model_paths[step.model]
+        return step.tracker_class.from_plan(model_path, step, self.plan)
+
+    def is_noop_step(self, tracker_name):
+        """Indica se o passo não tem efeito com a configuração do procedimento atual."""
+        rule = NOOP_STEPS.get(tracker_name)
+        return rule is not None and rule(self.plan)
 
     def update_video_path(self):
-        """Atualiza o caminho do vídeo com base no tracker atual."""
+        """Atualiza o caminho do vídeo com base no passo do tracker atual."""
         if self.current_tracker is None:
             return
 
-        tracker_name = self.current_tracker.__class__.__name__
-        if tracker_name == "StartTracker":
-            self.video_path = os.getenv("VIDEO_PATH_START")
-        elif tracker_name == "MacacaoTracker":
-            if self.expected_macacao_color == "macacao_branco":
-                return
-            self.video_path = os.getenv("VIDEO_PATH_MACACAO")
-        elif tracker_name == "PalletTracker":
-            self.video_path = os.getenv("VIDEO_PATH_PALLET")
-        elif tracker_name == "PacoteTracker":
-            self.video_path = os.getenv("VIDEO_PATH_PACOTE")
-        elif tracker_name == "StretchTracker":
-            self.video_path = os.getenv("VIDEO_PATH_STRETCH")
-        elif tracker_name == "FinishTracker":
-            self.video_path = os.getenv("VIDEO_PATH_FINISH")
-        elif tracker_name == "LabelPolpaTracker":
-            self.video_path = os.getenv("VIDEO_PATH_LABEL")
-        elif tracker_name == "PacotePolpaTracker":
-            self.video_path = os.getenv("VIDEO_PATH_PACOTE_POLPA")
-        else:
-            self.video_path = os.getenv("VIDEO_PATH_DEFAULT")
-
-        self.video_capture.stop_capture()
-        self.video_capture = VideoCapture(self.video_path, self.frame_process)
-        self.video_capture.start_capture()
+        self.video_path = self.video_paths[self.current_tracker.step.video_path_var]
+        self.video_capture.switch(self.video_path)
 
     def frame_process(self, frame):
         """Callback para processar cada frame, gerenciando o ciclo de vida dos trackers."""
-        global frame_buffer
-
-        if CancelHandler.get_isCanceled_value():
-            logging.warning(
-                "[InspectProcedure] Procedimento cancelado durante o processamento do frame."
-            )
-            self.cancel_procedure()
+        if self.finished:
             return
-        
-        if SkipHandler.get_isSkipped_value():
-            if self.current_tracker:
+
+        for command, value in self.control.drain():
+            if command == SessionControl.CANCEL:
+                logging.warning(
+                    "[InspectProcedure] Procedimento cancelado durante o processamento do frame."
+                )
+                self.cancel_procedure()
+                return
+            elif command == SessionControl.SKIP:
+                if self.current_tracker is None:
+                    # Nenhum tracker ativo ainda: o skip vale para o próximo frame
+                    self.control.skip(value)
+                    continue
                 logging.info(f"[InspectProcedure] Forçando avanço (skip) para o tracker: {self.current_tracker.__class__.__name__}")
-                self.current_tracker.skip(SkipHandler.get_skipJustification_value()) 
-                SkipHandler.reset_isSkipped_value()
-                SkipHandler.reset_skipJustification_value() 
+                self.current_tracker.skip(value)
+            elif command == SessionControl.ETIQUETA:
+                self.valor_etiqueta = value
+                self.quantidade_etiqueta += 1
 
         if self.current_tracker is None or not self.current_tracker.isSpecting:
             if self.current_tracker is not None:
                 tracker_name = type(self.current_tracker).__name__
-                logging.info(f"[GPU Manager] Descarregando modelo de: {tracker_name}")
-                del self.current_tracker
-                torch.cuda.empty_cache()  # Limpa o cache da GPU
+                # O modelo continua residente no ModelRegistry; apenas o estado do tracker é descartado
+                logging.info(f"[GPU Manager] Finalizando tracker: {tracker_name}")
+                self.collect_results(self.current_tracker)
+                scheduler = getattr(self.current_tracker, "scheduler", None)
+                if scheduler is not None:
+                    logging.info(f"[InspectProcedure] Inferências de {tracker_name}: {scheduler.stats()}")
+                self.current_tracker = None
             self.tracker_index += 1
 
             if self.tracker_index < len(self.tracker_order):
-                next_tracker_name = self.tracker_order[self.tracker_index]
-                self.current_tracker = self.create_tracker_by_name(next_tracker_name)
+                next_step = self.tracker_order[self.tracker_index]
+                self.current_tracker = self.create_tracker(next_step)
                 self.update_video_path()
+                # Este frame é da câmera do passo anterior: o novo tracker começa no próximo
+                return
             else:
                 self.video_capture.stop_capture()
                 logging.info("[InspectProcedure] Todos os trackers finalizados.")
                 self.timestamp_fim = datetime.now()
                 self.save_on_db()
-                time.sleep(3)
-                os._exit(0)
-                return  # Finaliza a execução
-
-        processed_frame = self.current_tracker.process_video(frame)
+                self.finished = True
+                return  # Finaliza a sessão; o processo segue atendendo novos procedimentos
 
-        with frame_lock:
-            if not frame_buffer.full():
-                frame_buffer.put(processed_frame)
+        # Sem ninguém assistindo ao /video_feed não há overlay a desenhar nem frame a copiar
+        streaming = self.stream_hub.has_subscribers()
+        if hasattr(self.current_tracker, "annotate"):
+            self.current_tracker.annotate = streaming
 
-        return processed_frame
-
-    def get_procedure_info(self, procedure_name):
-        """Retorna as informações do procedimento com base no nome."""
-        for procedure in self.procedures_json["procedimentos"]:
-            if procedure["nome"] == procedure_name:
-                ordem_str = procedure[
-                    "ordem"
-                ]  # Ex: "[self.startTracker, self.macacaoTracker]"
+        processed_frame = self.current_tracker.process_video(frame)
+        if not streaming:
+            return processed_frame
 
-                sanitized_str = (
-                    ordem_str.strip("[]").replace("self.", "").replace(" ", "")
-                )
+        if processed_frame is frame:
+            # O frame de entrada é uma view do ring da captura e será reutilizado
+            processed_frame = frame.copy()
 
-                tracker_instance_names = sanitized_str.split(",")
+        self.stream_hub.publish(processed_frame)
 
-                ordem = [
-                    name[0].upper() + name[1:]
-                    for name in tracker_instance_names
-                    if name
-                ]
+        return processed_frame
 
-                return (
-                    procedure["info"][0]["expected_macacao_color"],
-                    procedure["info"][1]["expected_pallet_color"],
-                    procedure["info"][2]["expected_pallet_class"],
-                    ordem,
-                )
-        return None, None, None, None
-
-    def get_db_info(self, procedure_name):
-        """Retorna os comandos para salvar no banco de dados."""
-        for procedure in self.procedures_json["procedimentos"]:
-            if procedure["nome"] == procedure_name:
-                return eval(procedure["db_command_etapas"]), eval(
-                    procedure["db_command_alertas"]
-                )
-        return None, None
+    def collect_results(self, tracker):
+        """Guarda os resultados (RESULT_FIELDS) do tracker para a gravação no banco."""
+        name = type(tracker).__name__
+        self.tracker_results[name] = {
+            field: getattr(tracker, field) for field in tracker.RESULT_FIELDS
+        }
 
     def process_video_on_procedure(self, procedure_name):
-        """Inicia o processamento de vídeo para um procedimento válido."""
-        if any(
-            proc["nome"] == procedure_name
-            for proc in self.procedures_json["procedimentos"]
-        ):
-            logging.info(
-                f"[InspectProcedure] Procedimento '{procedure_name}' encontrado. Iniciando processamento."
+        """Executa (bloqueante) o processamento de vídeo para um procedimento válido."""
+        plan = self.procedures.get(procedure_name)
+        if plan is None:
+            logging.error(
+                f"[InspectProcedure] Procedimento '{procedure_name}' não encontrado no JSON."
             )
-            self.current_procedure = procedure_name
-
-            CancelHandler.set_isCanceled_value(False)
-            EtiquetaHandler.set_quantidade_etiqueta_zero()
-            EtiquetaHandler.set_valor_etiqueta(None)
-            (
-                self.expected_macacao_color,
-                self.expected_color,
-                self.expected_pallet_class,
-                tracker_names_order,
-            ) = self.get_procedure_info(procedure_name)
-
-            if "polpa" in procedure_name:
-                tracker_names_order[3] = "PacotePolpaTracker"
-            else:
-                tracker_names_order[3] = "PacoteTracker"
+            return
 
-            self.tracker_order = tracker_names_order
+        logging.info(
+            f"[InspectProcedure] Procedimento '{procedure_name}' encontrado. Iniciando processamento."
+        )
+        self.plan = plan
+        self.current_procedure = procedure_name
 
-            logging.info(f"[InspectProcedure] Ordem de execução: {self.tracker_order}")
+        self.quantidade_etiqueta = 0
+        self.valor_etiqueta = None
+        self.tracker_results = {}
 
-            self.tracker_index = -1
-            self.current_tracker = None
+        skipped = [name for name in plan.step_names if self.is_noop_step(name)]
+        if skipped:
+            logging.info(f"[InspectProcedure] Passos sem efeito neste procedimento (pulados): {skipped}")
+        for step in plan.steps:
+            if step.name in skipped:
+                self.tracker_results[step.name] = step.tracker_class.skipped_result()
+        self.tracker_order = [step for step in plan.steps if step.name not in skipped]
 
-            self.timestamp_inicio = datetime.now()
+        logging.info(f"[InspectProcedure] Ordem de execução: {[step.name for step in self.tracker_order]}")
 
-            self.video_capture.start_capture()
-        else:
-            logging.error(
-                f"[InspectProcedure] Procedimento '{procedure_name}' não encontrado no JSON."
-            )
+        self.tracker_index = -1
+        self.current_tracker = None
 
-    def save_on_db(self):
-        """Salva os dados do procedimento no banco de dados."""
-        db_command_etapas, db_command_alertas = self.get_db_info(self.current_procedure)
-        self.alerta_total = db_command_alertas
+        self.timestamp_inicio = datetime.now()
+
+        self.video_capture.switch(self.video_path)
+        self.video_capture.start_capture()
+
+    def procedure_record(self):
+        """Registro do procedimento (etapas, alertas, etiqueta e horários) no formato do banco."""
+        db_command_etapas = self.plan.collect_etapas(self.tracker_results)
+        self.alerta_total = self.plan.collect_alertas(self.tracker_results)
 
         procedimento = {
             "timestamp_inicio": self.timestamp_inicio,
             "timestamp_fim": self.timestamp_fim,
-            "etiqueta": f"{EtiquetaHandler.get_valor_etiqueta()}",
-            "quantidade_etiquetas": EtiquetaHandler.get_quantidade_etiqueta(),
+            "etiqueta": f"{self.valor_etiqueta}",
+            "quantidade_etiquetas": self.quantidade_etiqueta,
             "alertas": {"alerta": f"{self.alerta_total}"},
             "etapa_1": db_command_etapas[0],
             "etapa_2": db_command_etapas[1],
@@ -359,6 +323,11 @@ class InspectProcedure:
             "observacoes": f"{self.obs}",
             "id_procedimento": f"{self.current_procedure}",
         }
+        return procedimento
+
+    def save_on_db(self):
+        """Salva os dados do procedimento no banco de dados."""
+        procedimento = self.procedure_record()
         logging.info(
             f"[InspectProcedure] Salvando no banco de dados:\n{json.dumps(procedimento, indent=2, default=str)}"
         )
@@ -370,18 +339,183 @@ class InspectProcedure:
         """Cancela o procedimento atual e salva seu estado."""
         self.timestamp_fim = datetime.now()
         self.obs = "Operação cancelada."
+        if self.current_tracker is not None:
+            self.collect_results(self.current_tracker)
         self.save_on_db()
 
         if self.current_tracker:
             self.current_tracker.isSpecting = False
 
         self.video_capture.stop_capture()
+        self.finished = True
         logging.info("[InspectProcedure] Procedimento cancelado e salvo.")
-        os._exit(0)
+
+
+class ProcedureSupervisor:
+    """
+    Consumidor de longa duração do tópico 'procedimento'. Cada mensagem vira
+    uma sessão (InspectProcedure) executada em sua própria thread; modelos,
+    decodificadores de câmera e conexões são compartilhados entre sessões.
+
+    Sessões que usam alguma câmera em comum (a mesma doca) nunca rodam ao
+    mesmo tempo: a seguinte aguarda na fila, em ordem de chegada, assim como
+    as que excedem MAX_CONCURRENT_PROCEDURES.
+    """
+
+    def __init__(self, max_sessions=None):
+        self.max_sessions = max_sessions or int(
+            os.getenv("MAX_CONCURRENT_PROCEDURES", "4")
+        )
+        self.sessions = {}  # {session_id: InspectProcedure}
+        self.pending = deque()  # [(session_id, procedimento, video_paths, doca, câmeras)] aguardando vez
+        self._targets = {}  # {session_id: (procedimento, doca)} das sessões ativas, para direcionar comandos
+        self._cameras = {}  # {session_id: câmeras em uso pela sessão ativa}
+        self._lock = Lock()
+        self._next_session_id = 0
+
+        # Falha cedo se procedimentos.json tiver definições inválidas
+        ProcedureConfig.load()
+
+        # Paga o custo de CUDA/modelos/câmeras uma única vez, antes do primeiro procedimento
+        InspectProcedure.preload_resources(
+            os.getenv(name) for name in VIDEO_PATH_VARS.values()
+        )
+
+    def start_session(self, procedure_name, video_paths=None, dock=None):
+        """
+        Aceita um procedimento: inicia a sessão já ou a enfileira até suas
+        câmeras (e uma vaga) ficarem livres. Retorna o id da sessão.
+        """
+        cameras = InspectProcedure.camera_urls(video_paths)
+        dock = None if dock is None else str(dock)
+        with self._lock:
+            session_id = self._next_session_id
+            self._next_session_id += 1
+            self.pending.append((session_id, procedure_name, video_paths, dock, cameras))
+            started = self._start_pending()
+
+        if session_id not in started:
+            logging.info(
+                f"[Supervisor] '{procedure_name}' (sessão {session_id}) na fila: câmeras em uso por outra sessão "
+                f"ou limite de {self.max_sessions} procedimentos simultâneos atingido."
+            )
+        return session_id
+
+    def _start_pending(self):
+        """Inicia, em ordem de chegada, as sessões pendentes que podem rodar agora. Chamar com o lock."""
+        busy = set().union(*self._cameras.values())
+        started = []
+        waiting = deque()
+        for item in self.pending:
+            session_id, procedure_name, video_paths, dock, cameras = item
+            if cameras & busy or len(self.sessions) >= self.max_sessions:
+                waiting.append(item)
+                busy |= cameras  # Quem chegou depois para as mesmas câmeras espera esta
+                continue
+            try:
+                session = InspectProcedure(video_paths, dock)
+            except Exception as e:
+                logging.exception(f"[Supervisor] Sessão {session_id} ({procedure_name}) não pôde ser criada: {e}")
+                continue
+            self.sessions[session_id] = session
+            self._cameras[session_id] = cameras
+            self._targets[session_id] = (procedure_name, dock)
+            busy |= cameras
+            Thread(
+                target=self._run_session,
+                args=(session_id, session, procedure_name),
+                daemon=True,
+            ).start()
+            started.append(session_id)
+        self.pending = waiting
+        return started
+
+    def _run_session(self, session_id, session, procedure_name):
+        try:
+            session.process_video_on_procedure(procedure_name)
+        except Exception as e:
+            logging.exception(f"[Supervisor] Sessão {session_id} ({procedure_name}) falhou: {e}")
+            session.video_capture.stop_capture()
+        finally:
+            with self._lock:
+                self.sessions.pop(session_id, None)
+                self._cameras.pop(session_id, None)
+                self._targets.pop(session_id, None)
+                self._start_pending()
+            logging.info(f"[Supervisor] Sessão {session_id} ({procedure_name}) encerrada.")
+
+    def post(self, command, value=None, session_id=None, dock=None, procedure_name=None):
+        """
+        Envia um comando a uma única sessão, identificada pelo id, pela doca
+        e/ou pelo procedimento. Sem nenhum filtro, só é aceito se houver uma
+        única sessão ativa. Cancelamentos também alcançam sessões na fila.
+        Retorna o id da sessão notificada; levanta LookupError se nenhuma ou
+        mais de uma sessão corresponder.
+        """
+        if session_id is not None:
+            try:
+                session_id = int(session_id)
+            except (TypeError, ValueError):
+                raise LookupError(f"Sessão inválida: {session_id!r}.")
+        if dock is not None:
+            dock = str(dock)
+
+        with self._lock:
+            candidates = [
+                (sid, procedure, doca, False) for sid, (procedure, doca) in self._targets.items()
+            ]
+            if command == SessionControl.CANCEL:
+                candidates += [(item[0], item[1], item[3], True) for item in self.pending]
+
+            matches = [
+                candidate for candidate in candidates
+                if (session_id is None or candidate[0] == session_id)
+                and (dock is None or candidate[2] == dock)
+                and (procedure_name is None or candidate[1] == procedure_name)
+            ]
+            target = f"sessao={session_id}, doca={dock}, procedimento={procedure_name}"
+            if not matches:
+                raise LookupError(f"Nenhuma sessão corresponde a ({target}).")
+            if len(matches) > 1:
+                raise LookupError(
+                    f"{len(matches)} sessões correspondem a ({target}); informe 'sessao' ou 'doca'."
+                )
+
+            sid, procedure, _, queued = matches[0]
+            if queued:
+                self.pending = deque(item for item in self.pending if item[0] != sid)
+                logging.info(f"[Supervisor] Sessão {sid} ({procedure}) cancelada antes de iniciar.")
+            else:
+                self.sessions[sid].control.post(command, value)
+        return sid
+
+    def run(self):
+        """Consome o tópico 'procedimento' indefinidamente."""
+        kafka_listener = KafkaListener(topic="procedimento")
+        logging.info("[Main] Aguardando mensagens do Kafka no tópico 'procedimento'...")
+        for message in kafka_listener.listen():
+            if isinstance(message, dict):
+                procedure_name = message.get("procedimento")
+                if procedure_name:
+                    logging.info(f"[Main] Procedimento recebido: {procedure_name}")
+                    # Commit só depois de aceito (iniciado ou na fila)
+                    self.start_session(
+                        procedure_name, message.get("video_paths"), message.get("doca")
+                    )
+                    kafka_listener.commit()
+                else:
+                    logging.warning(
+                        "[Main] Mensagem Kafka não contém o campo 'procedimento'."
+                    )
+            else:
+                logging.warning(f"[Main] Mensagem recebida não é um dicionário: {message}")
 
 
 # --- ROTAS FLASK E THREADS ---
 
+# Supervisor das sessões (criado no __main__), usado pelas rotas e listeners
+supervisor = None
+
 @app.route("/skip_step", methods=['POST'])
 @cross_origin()
 def skip_step():
@@ -406,10 +540,24 @@ def skip_step():
     justification = data['justification']
     logging.info(f"[API] Justificativa para o skip: '{justification}'")
 
-    SkipHandler.set_skipJustification_value(justification)
-    SkipHandler.set_isSkipped_value(True)
+    # Campos opcionais 'sessao', 'doca' e 'procedimento' direcionam o skip quando há várias sessões ativas
+    try:
+        session_id = supervisor.post(
+            SessionControl.SKIP,
+            justification,
+            session_id=data.get("sessao"),
+            dock=data.get("doca"),
+            procedure_name=data.get("procedimento"),
+        )
+    except LookupError as e:
+        logging.error(f"[API] Skip não direcionado: {e}")
+        return Response(
+            json.dumps({"status": "error", "message": str(e)}),
+            status=404,
+            mimetype="application/json"
+        )
     return Response(
-        json.dumps({"status": "success", "message": "Sinal de skip recebido com sucesso."}),
+        json.dumps({"status": "success", "message": "Sinal de skip recebido com sucesso.", "sessao": session_id}),
         status=200,
         mimetype="application/json"
     )
@@ -417,20 +565,20 @@ def skip_step():
 @app.route("/video_feed")
 @cross_origin()
 def video_feed():
+    """
+    Stream MJPEG do frame processado mais recente de uma doca.
+    Parâmetros opcionais: ?doca=<doca>&fps=<teto de quadros/s>&tier=<high|medium|low>
+    """
+    hub = StreamHub.for_dock(request.args.get("doca"))
+    fps = request.args.get("fps", type=float)
+    tier = request.args.get("tier", "high")
+
     def generate():
-        global frame_buffer
-        while True:
-            try:
-                frame = frame_buffer.get(block=True, timeout=0.1)
-                ret, jpeg = cv2.imencode(".jpg", frame)
-                if ret:
-                    frame_bytes = jpeg.tobytes()
-                    yield (
-                        b"--frame\r\n"
-                        b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n\r\n"
-                    )
-            except Empty:
-                time.sleep(0.05)
+        for frame_bytes in hub.subscribe(fps=fps, tier=tier):
+            yield (
+                b"--frame\r\n"
+                b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n\r\n"
+            )
 
     return Response(generate(), mimetype="multipart/x-mixed-replace; boundary=frame")
 
@@ -441,25 +589,8 @@ def run_flask():
 
 
 def run_kafka():
-    """Inicia o consumidor Kafka para o tópico de procedimentos."""
-    video = InspectProcedure()
-    kafka_listener = KafkaListener(topic="procedimento")
-    logging.info("[Main] Aguardando mensagens do Kafka no tópico 'procedimento'...")
-    for message in kafka_listener.listen():
-        if isinstance(message, dict):
-            procedure_name = message.get("procedimento")
-            if procedure_name:
-                logging.info(f"[Main] Procedimento recebido: {procedure_name}")
-                kafka_listener.commit()
-                video.process_video_on_procedure(procedure_name)
-                kafka_listener.close()
-                break  # Sai do loop após receber e iniciar um procedimento
-            else:
-                logging.warning(
-                    "[Main] Mensagem Kafka não contém o campo 'procedimento'."
-                )
-        else:
-            logging.warning(f"[Main] Mensagem recebida não é um dicionário: {message}")
+    """Inicia o supervisor de procedimentos no tópico 'procedimento'."""
+    supervisor.run()
 
 
 def run_kafka_cancel():
@@ -472,9 +603,15 @@ def run_kafka_cancel():
         if isinstance(message, dict):
             logging.info("[Main] Recebido comando de cancelamento.")
             kafka_cancel_listener.commit()
-            CancelHandler.set_isCanceled_value(True)
-            time.sleep(5)
-            os._exit(0)
+            try:
+                supervisor.post(
+                    SessionControl.CANCEL,
+                    session_id=message.get("sessao"),
+                    dock=message.get("doca"),
+                    procedure_name=message.get("procedimento"),
+                )
+            except LookupError as e:
+                logging.warning(f"[Main] Cancelamento ignorado: {e}")
 
 
 def run_etiquetas_listener():
@@ -486,13 +623,23 @@ def run_etiquetas_listener():
             qr_code = message.get("etiqueta")
             if qr_code:
                 logging.info(f"[MAIN] QR CODE LIDO: {qr_code}")
-                EtiquetaHandler.set_valor_etiqueta(qr_code)
-                EtiquetaHandler.set_quantidade_etiqueta(1)
+                try:
+                    supervisor.post(
+                        SessionControl.ETIQUETA,
+                        qr_code,
+                        session_id=message.get("sessao"),
+                        dock=message.get("doca"),
+                        procedure_name=message.get("procedimento"),
+                    )
+                except LookupError as e:
+                    logging.warning(f"[MAIN] Etiqueta ignorada: {e}")
 
 
 if __name__ == "__main__":
     logging.info("[Main] Iniciando aplicação...")
 
+    supervisor = ProcedureSupervisor()
+
     # Inicia o Flask em uma thread separada
     flask_thread = Thread(target=run_flask)
     flask_thread.daemon = True
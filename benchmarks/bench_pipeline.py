@@ -0,0 +1,367 @@
+"""
+Benchmark de vazão/latência do pipeline dos trackers, sem GPU nem serviços.
+
+Alimenta frames sintéticos (ou de um vídeo gravado) em cada tracker de
+processes/ e no caminho completo do InspectProcedure.frame_process, com
+modelos stub (benchmarks/stubs.py) no ModelRegistry e as mensagens Kafka
+capturadas localmente. Mede quadros/s, p50/p95/p99 por estágio (resize,
+inference, postprocess, decide, annotation, publish e o frame inteiro), as
+inferências reais e reaproveitadas (scheduler/pré-filtro de movimento) e o pico
+de RSS do processo, e grava tudo em JSON para comparar entre commits.
+
+O estágio "inference" inclui os frames em que o scheduler devolve as últimas
+detecções sem chamar o modelo; com --no-scheduler todo frame chama o modelo.
+O pico de RSS é o máximo acumulado do processo até o fim de cada seção.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_pipeline [--frames 3000] [--video gravacao.mp4]
+        [--model-latency-ms 0] [--no-stream] [--no-scheduler] [-o resultado.json] [--compare base.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+load_dotenv()
+# Sem serviços: usa o procedimentos.json do repositório se JSON_PATH não existir aqui
+# e não grava snapshots dos trackers
+if not os.path.exists(os.getenv("JSON_PATH") or ""):
+    os.environ["JSON_PATH"] = os.path.join(REPO_DIR, "procedimentos.json")
+os.environ["SAVE_RESULTS"] = ""
+
+from api import InspectProcedure, MODEL_PATHS  # noqa: E402
+from benchmarks.stage_timer import StageTimer, peak_rss_so_far_mb  # noqa: E402
+from benchmarks.stubs import StubKafka, install_stub_models  # noqa: E402
+from procedure_config.procedure_config import ProcedureConfig, STEP_TYPES  # noqa: E402
+from video_config.stamped_frame import StampedFrame  # noqa: E402
+from video_config.stream_hub import StreamHub  # noqa: E402
+from video_config.video_capture import VideoCapture  # noqa: E402
+
+# Método do BaseTracker -> estágio reportado
+TRACKER_STAGES = {
+    "preprocess": "resize",
+    "infer": "inference",
+    "postprocess": "postprocess",
+    "decide": "decide",
+    "draw": "annotation",
+}
+ENV_FLAGS = ("INFERENCE_BATCHING", "INFERENCE_SCHEDULER", "ROI_INFERENCE", "MOTION_GATE")
+
+
+# --- Fontes de frames ---
+
+def synthetic_pool(size, pool=60, seed=0):
+    """Frames de fundo com ruído e blocos em movimento (o pré-filtro de movimento tem o que ver)."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    background = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(pool):
+        frame = background.copy()
+        x = int((i / pool) * (width - 120))
+        cv2.rectangle(frame, (x, height // 3), (x + 120, height // 3 + 160), (50, 90, 210), -1)
+        cv2.rectangle(frame, (width - x - 100, height // 2), (width - x, height // 2 + 100), (0, 180, 0), -1)
+        frames.append(frame)
+    return frames
+
+
+def recorded_pool(path, pool=300):
+    """Primeiros `pool` frames de um vídeo gravado, decodificados antes da medição."""
+    capture = VideoCapture(path)
+    frames = []
+    while len(frames) < pool:
+        frame = capture.read()
+        if frame is None:
+            break
+        frames.append(np.asarray(frame).copy())
+    capture.stop_capture()
+    if not frames:
+        raise ValueError(f"Nenhum frame lido de {path}")
+    return frames
+
+
+def stamped_frames(pool, count, fps):
+    """Percorre o pool em ciclo, carimbando cada frame com o tempo de vídeo a `fps` quadros/s."""
+    for i in range(count):
+        yield StampedFrame.wrap(pool[i % len(pool)], i / fps, i + 1)
+
+
+# --- Sessão instrumentada ---
+
+def instrument(tracker, timer):
+    for method, stage in TRACKER_STAGES.items():
+        timer.wrap(tracker, method, stage)
+    timer.trackers.append(tracker)
+    return tracker
+
+
+class BenchCapture:
+    """Substitui o CameraManager: entrega os frames da fonte do benchmark ao callback."""
+
+    def __init__(self, frame_callback, frames, timer):
+        self.frame_callback = frame_callback
+        self.frames = frames
+        self.timer = timer
+        self.running = False
+
+    def switch(self, url):
+        pass
+
+    def start_capture(self):
+        self.running = True
+        while self.running:
+            frame = next(self.frames, None)
+            if frame is None:
+                break
+            started = time.perf_counter()
+            self.frame_callback(frame)
+            self.timer.record("frame", time.perf_counter() - started)
+
+    def stop_capture(self):
+        self.running = False
+
+
+class BenchSession(InspectProcedure):
+    """InspectProcedure com modelos stub, sem câmeras nem banco, e trackers instrumentados."""
+
+    def __init__(self, timer, frames=None, plan=None, stream_hub=None):
+        self.timer = timer
+        super().__init__()
+        self.video_capture = BenchCapture(self.frame_process, frames, timer)
+        if stream_hub is not None:
+            self.stream_hub = stream_hub
+        self.record = None
+        if plan is not None:
+            # Parâmetros do procedimento para criar trackers avulsos
+            self.plan = plan
+            self.current_procedure = plan.name
+
+    @staticmethod
+    def preload_resources(video_paths):
+        InspectProcedure.preload_models()
+
+    def create_tracker(self, step):
+        return instrument(super().create_tracker(step), self.timer)
+
+    def save_on_db(self):
+        self.record = self.procedure_record()
+
+
+# --- Benchmarks ---
+
+def scheduler_stats(trackers):
+    """Soma de InferenceScheduler.stats() dos trackers: inferências reais e reaproveitadas."""
+    totals = {}
+    for tracker in trackers:
+        for key, value in tracker.scheduler.stats().items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def section_result(timer, frames, wall_seconds, **extra):
+    return {
+        "frames": frames,
+        "wall_seconds": round(wall_seconds, 3),
+        "fps": round(frames / wall_seconds, 1) if wall_seconds > 0 else None,
+        "stages": timer.summary(),
+        "scheduler": scheduler_stats(timer.trackers),
+        "peak_rss_so_far_mb": peak_rss_so_far_mb(),
+        **extra,
+    }
+
+
+def bench_tracker(tracker_name, plan, pool, count, fps, annotate):
+    """Um tracker isolado; ao terminar a etapa ele é recriado para cobrir todos os frames."""
+    timer = StageTimer()
+    session = BenchSession(timer, plan=plan)
+    step = session.procedures.step(tracker_name)
+    tracker = session.create_tracker(step)
+    restarts = 0
+
+    started = time.perf_counter()
+    for frame in stamped_frames(pool, count, fps):
+        if not tracker.isSpecting:
+            tracker = session.create_tracker(step)
+            restarts += 1
+        tracker.annotate = annotate
+        frame_started = time.perf_counter()
+        tracker.process_video(frame)
+        timer.record("frame", time.perf_counter() - frame_started)
+    wall_seconds = time.perf_counter() - started
+
+    return section_result(timer, count, wall_seconds, restarts=restarts)
+
+
+def bench_frame_process(procedure_name, pool, count, fps, stream):
+    """Caminho completo (frame_process): troca de trackers, overlay e publicação no stream."""
+    timer = StageTimer()
+    # Hub próprio; com `stream` finge um cliente no /video_feed para haver overlay e publicação
+    stream_hub = StreamHub()
+    stream_hub.subscribers = 1 if stream else 0
+    timer.wrap(stream_hub, "publish")
+
+    frames = stamped_frames(pool, count, fps)
+    completed = 0
+    started = time.perf_counter()
+    while True:
+        session = BenchSession(timer, frames, stream_hub=stream_hub)
+        session.process_video_on_procedure(procedure_name)
+        if not session.finished:
+            break  # Fonte de frames esgotada no meio do procedimento
+        completed += 1
+    wall_seconds = time.perf_counter() - started
+
+    return section_result(timer, count, wall_seconds, procedures_completed=completed)
+
+
+# --- Resultados ---
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR, capture_output=True, text=True
+        ).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_section(name, result):
+    stages = result["stages"]
+    scheduler = result["scheduler"]
+    print(
+        f"\n{name}: {result['fps']} fps ({result['frames']} frames, {scheduler.get('inferences', 0)} inferências, "
+        f"{scheduler.get('reused', 0)} reaproveitadas, pico RSS do processo {result['peak_rss_so_far_mb']} MB)"
+    )
+    for stage, stats in stages.items():
+        print(
+            f"  {stage:<12} p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms"
+            f"  p99 {stats['p99_ms']:>9.3f} ms  (n={stats['count']})"
+        )
+
+
+def compare(baseline, results):
+    """Variação de fps e de p95 por estágio em relação a um resultado anterior."""
+    print(f"\nComparação com {baseline.get('commit')}:")
+    sections = [("frame_process", baseline.get("frame_process"), results.get("frame_process"))]
+    sections += [
+        (name, baseline.get("trackers", {}).get(name), result)
+        for name, result in results.get("trackers", {}).items()
+    ]
+    for name, old, new in sections:
+        if not old or not new or not old.get("fps"):
+            continue
+        change = (new["fps"] - old["fps"]) / old["fps"] * 100
+        print(f"  {name:<20} fps {old['fps']:>8} -> {new['fps']:>8} ({change:+.1f}%)")
+        for stage, stats in new["stages"].items():
+            old_stats = old["stages"].get(stage)
+            if old_stats:
+                print(f"    {stage:<12} p95 {old_stats['p95_ms']:>9.3f} -> {stats['p95_ms']:>9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline dos trackers com modelos stub.")
+    parser.add_argument("--frames", type=int, default=3000, help="Frames por benchmark")
+    parser.add_argument("--fps", type=float, default=15.0, help="Taxa das câmeras simulada (tempo de vídeo)")
+    parser.add_argument("--size", default="640x640", help="Tamanho dos frames sintéticos (LxA)")
+    parser.add_argument("--video", help="Vídeo gravado em vez de frames sintéticos")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="Tempo simulado de cada forward")
+    parser.add_argument("--detections", type=int, default=6, help="Caixas devolvidas pelo modelo stub")
+    parser.add_argument("--procedure", default="feirinha_alergenico_critico", help="Procedimento do caminho completo")
+    parser.add_argument("--trackers", nargs="*", default=list(STEP_TYPES), help="Trackers a medir isoladamente")
+    parser.add_argument("--no-stream", action="store_true", help="Sem cliente no stream (sem overlay/publicação)")
+    parser.add_argument(
+        "--no-scheduler",
+        action="store_true",
+        help="Infere em todo frame (INFERENCE_SCHEDULER=False, MOTION_GATE=False)",
+    )
+    parser.add_argument("-o", "--output", help="Arquivo JSON (padrão: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Resultado JSON anterior para comparação")
+    parser.add_argument("--verbose", action="store_true", help="Mantém os logs dos trackers")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    pool = recorded_pool(args.video) if args.video else synthetic_pool((width, height))
+    stream = not args.no_stream
+    if args.no_scheduler:
+        # Lidos na criação de cada tracker: o estágio "inference" passa a medir só chamadas ao modelo
+        os.environ["INFERENCE_SCHEDULER"] = "False"
+        os.environ["MOTION_GATE"] = "False"
+
+    # Modelos stub no lugar dos pesos e Kafka capturado localmente
+    for rede, model_path in MODEL_PATHS.items():
+        MODEL_PATHS[rede] = model_path or f"stub/{rede}.pt"
+    install_stub_models(MODEL_PATHS.values(), args.detections, args.model_latency_ms / 1000.0)
+    kafka = StubKafka().install()
+
+    results = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "frames": args.frames,
+            "fps": args.fps,
+            "source": args.video or f"synthetic {width}x{height}",
+            "model_latency_ms": args.model_latency_ms,
+            "detections": args.detections,
+            "procedure": args.procedure,
+            "stream": stream,
+            "env": {name: os.getenv(name) for name in ENV_FLAGS},
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "cpu": platform.processor() or platform.machine(),
+        },
+        "trackers": {},
+    }
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    plan = ProcedureConfig.load().get(args.procedure)
+    if plan is None:
+        raise SystemExit(f"Procedimento '{args.procedure}' não encontrado.")
+
+    with quiet:
+        for tracker_name in args.trackers:
+            results["trackers"][tracker_name] = bench_tracker(
+                tracker_name, plan, pool, args.frames, args.fps, annotate=stream
+            )
+        kafka.messages = {}
+        results["frame_process"] = bench_frame_process(args.procedure, pool, args.frames, args.fps, stream)
+    kafka.uninstall()
+
+    results["frame_process"]["kafka_messages"] = kafka.messages
+    results["peak_rss_so_far_mb"] = peak_rss_so_far_mb()
+
+    for name, result in results["trackers"].items():
+        print_section(name, result)
+    print_section(f"frame_process ({args.procedure})", results["frame_process"])
+
+    output = args.output or os.path.join(REPO_DIR, "benchmarks", "results", f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as arquivo:
+        json.dump(results, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados em {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as arquivo:
+            compare(json.load(arquivo), results)
+
+
+if __name__ == "__main__":
+    main()
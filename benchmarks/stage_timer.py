@@ -0,0 +1,62 @@
+import functools
+import resource
+import sys
+import time
+import numpy as np
+
+
+class StageTimer:
+    """
+    Coleta a latência de cada estágio do pipeline. `wrap` instrumenta um método
+    de uma instância (ex.: tracker.preprocess) sem alterar a classe, então os
+    trackers de produção rodam inalterados.
+    """
+
+    def __init__(self):
+        self.samples = {}  # {estágio: [segundos]}
+        self.trackers = []  # Trackers instrumentados na medição (para somar as estatísticas do scheduler)
+
+    def record(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, obj, method, stage=None):
+        stage = stage or method
+        original = getattr(obj, method)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        setattr(obj, method, timed)
+        return obj
+
+    def summary(self):
+        """Estatísticas (ms) por estágio: contagem, média, p50/p95/p99 e máximo."""
+        stats = {}
+        for stage, samples in self.samples.items():
+            values = np.asarray(samples) * 1000.0
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stats[stage] = {
+                "count": len(values),
+                "mean_ms": round(float(values.mean()), 4),
+                "p50_ms": round(float(p50), 4),
+                "p95_ms": round(float(p95), 4),
+                "p99_ms": round(float(p99), 4),
+                "max_ms": round(float(values.max()), 4),
+            }
+        return stats
+
+
+def peak_rss_so_far_mb():
+    """
+    Pico de memória residente do processo (MB) desde o início, não de um trecho:
+    como os benchmarks rodam em sequência no mesmo processo, cada valor inclui
+    os picos de todos os anteriores.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
@@ -0,0 +1,87 @@
+import os
+import time
+import types
+import numpy as np
+from kafka_config.kafka_config import KafkaMessenger
+from model_config.model_registry import ModelRegistry
+
+# Classes conhecidas pelos trackers (filtros por nome em processes/)
+STUB_NAMES = {
+    0: "pacote",
+    1: "etiqueta",
+    2: "caixa",
+    3: "macacao_azul",
+    4: "strechadeira",
+    5: "pallet_coberto",
+    6: "pessoa",
+}
+
+
+class StubModel:
+    """
+    Substituto do YOLO para benchmarks em CPU, sem pesos.
+    Devolve `detections` caixas por imagem em posições normalizadas ao tamanho
+    da entrada (com um pequeno tremor entre chamadas, como um detector real),
+    de modo que recortes de ROI também recebem caixas dentro do recorte.
+    `latency` (s) simula o tempo de forward por chamada (lote).
+    """
+
+    def __init__(self, detections=6, latency=0.0, seed=0):
+        self.names = dict(STUB_NAMES)
+        self.latency = latency
+        self.calls = 0
+        self.images = 0
+        self._rng = np.random.default_rng(seed)
+
+        # Caixas base (x1, y1, x2, y2) normalizadas, com classe e confiança fixas
+        centers = self._rng.uniform(0.2, 0.8, size=(detections, 2))
+        sizes = self._rng.uniform(0.1, 0.3, size=(detections, 2))
+        self._boxes = np.hstack([centers - sizes / 2, centers + sizes / 2]).clip(0, 1)
+        self._conf = self._rng.uniform(0.7, 0.95, size=detections)
+        self._cls = np.arange(detections) % len(self.names)
+
+    def _result(self, image):
+        height, width = image.shape[:2]
+        jitter = self._rng.normal(0, 0.005, size=self._boxes.shape)
+        boxes = (self._boxes + jitter).clip(0, 1) * (width, height, width, height)
+        data = np.column_stack([boxes, self._conf, self._cls]).astype(np.float32)
+        return types.SimpleNamespace(names=self.names, boxes=types.SimpleNamespace(data=data))
+
+    def __call__(self, source, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        self.calls += 1
+        self.images += len(images)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._result(image) for image in images]
+
+
+def install_stub_models(model_paths, detections=6, latency=0.0):
+    """
+    Registra um StubModel para cada caminho no ModelRegistry, como se já
+    estivesse carregado: o restante do caminho (InferenceService, RoiInference)
+    é o de produção.
+    """
+    stubs = {}
+    for model_path in set(p for p in model_paths if p):
+        stub = StubModel(detections=detections, latency=latency)
+        ModelRegistry._models[os.path.abspath(model_path)] = stub
+        stubs[model_path] = stub
+    return stubs
+
+
+class StubKafka:
+    """Destino das mensagens dos trackers durante o benchmark: só conta por tópico."""
+
+    def __init__(self):
+        self.messages = {}
+
+    def __call__(self, topic, json_data):
+        self.messages[topic] = self.messages.get(topic, 0) + 1
+
+    def install(self):
+        KafkaMessenger.sink = self
+        return self
+
+    def uninstall(self):
+        KafkaMessenger.sink = None
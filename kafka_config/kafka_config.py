@@ -1,41 +1,153 @@
 from kafka import KafkaProducer, KafkaConsumer
+import threading
+import atexit
+import queue
 import json
 import time
-import uuid
+import os
+
+class SharedProducer:
+    """
+    Produtor Kafka compartilhado por processo (um por bootstrap_servers).
+    `send` apenas enfileira a mensagem em uma fila limitada e retorna; uma
+    thread de fundo repassa ao KafkaProducer, que agrupa em lote (linger_ms)
+    e comprime. Com a fila cheia a mensagem é descartada e contabilizada,
+    de modo que quem envia (os trackers) nunca bloqueia no broker.
+    """
+
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, bootstrap_servers, queue_size=None, linger_ms=None, compression=None):
+        self.bootstrap_servers = bootstrap_servers
+        self.queue_size = queue_size or int(os.getenv("KAFKA_QUEUE_SIZE", "1000"))
+        self.linger_ms = linger_ms if linger_ms is not None else int(os.getenv("KAFKA_LINGER_MS", "20"))
+        self.compression = compression or os.getenv("KAFKA_COMPRESSION", "gzip")
+
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+
+        self._producer = None
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def get(cls, bootstrap_servers):
+        """Retorna o produtor compartilhado para `bootstrap_servers`, criando-o na primeira chamada."""
+        with cls._lock:
+            producer = cls._instances.get(bootstrap_servers)
+            if producer is None:
+                producer = cls(bootstrap_servers)
+                cls._instances[bootstrap_servers] = producer
+            return producer
+
+    def send(self, topic, json_data):
+        """Enfileira a mensagem sem bloquear. Retorna False se ela foi descartada (fila cheia)."""
+        try:
+            self._queue.put_nowait((topic, json_data))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            print(f"[SharedProducer] Fila de saída cheia, mensagem descartada ('{topic}'): {json_data}")
+            return False
+
+    def _connect(self):
+        # Conexão preguiçosa: feita na thread de envio para não atrasar quem cria o messenger
+        while self._producer is None:
+            try:
+                self._producer = KafkaProducer(
+                    bootstrap_servers=self.bootstrap_servers,
+                    value_serializer=lambda v: json.dumps(v).encode('utf-8'),  # Serializa o JSON
+                    linger_ms=self.linger_ms,
+                    compression_type=self.compression,
+                )
+            except Exception as e:
+                print(f"[SharedProducer] Falha ao conectar em {self.bootstrap_servers}: {e}. Nova tentativa em 3s")
+                time.sleep(3)
+        return self._producer
+
+    def _run(self):
+        while True:
+            topic, json_data = self._queue.get()
+            try:
+                producer = self._connect()
+                future = producer.send(topic, json_data)
+            except Exception as e:
+                self.failed += 1
+                print(f"[SharedProducer] Erro ao enviar para '{topic}': {e}")
+                continue
+            finally:
+                # Só depois de repassada ao KafkaProducer a mensagem deixa de contar para flush()
+                self._queue.task_done()
+            self.sent += 1
+            future.add_callback(self._on_delivery)
+            future.add_errback(self._on_error, topic, json_data)
+
+    def _on_delivery(self, metadata):
+        self.delivered += 1
+
+    def _on_error(self, exc, topic, json_data):
+        self.failed += 1
+        print(f"[SharedProducer] Falha na entrega para '{topic}': {exc} ({json_data})")
+
+    def flush(self, timeout=None):
+        """Aguarda a fila de saída esvaziar e o produtor entregar o que está em lote."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Inclui a mensagem já retirada da fila e ainda em producer.send (task_done pendente)
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return
+                self._queue.all_tasks_done.wait(remaining)
+        if self._producer is not None:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            self._producer.flush(timeout=remaining)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "sent": self.sent,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+    @classmethod
+    def flush_all(cls, timeout=5.0):
+        for producer in list(cls._instances.values()):
+            producer.flush(timeout)
+
+
+atexit.register(SharedProducer.flush_all)
+
 
 class KafkaMessenger:
+    # Destino alternativo das mensagens (callable(topic, json_data)), usado fora da
+    # produção (ex.: replay offline). Quando definido, nada é enviado ao broker.
+    sink = None
+
     def __init__(self, topic, bootstrap_servers='kafka:9092'):
-        self.producer = KafkaProducer(
-            bootstrap_servers=bootstrap_servers,
-            value_serializer=lambda v: json.dumps(v).encode('utf-8')  # Serializa o JSON
-        )
+        self.producer = SharedProducer.get(bootstrap_servers)  # Conexão única por processo
         self.topic = topic  # Tópico pode ser definido ao instanciar a classe
     
     def send_message(self, json_data):
         """
-        Envia um JSON para o tópico Kafka.
+        Enfileira um JSON para o tópico Kafka (não bloqueia; o envio é feito em lote em segundo plano).
         :param json_data: Dicionário Python contendo o JSON a ser enviado.
         """
-        self.producer.send(self.topic, json_data)
-        self.producer.flush()  # Garante que a mensagem seja enviada
-        print(f"[KafkaMessenger] JSON enviado para o tópico '{self.topic}': {json_data}")
+        if KafkaMessenger.sink is not None:
+            KafkaMessenger.sink(self.topic, json_data)
+            return
+        if self.producer.send(self.topic, json_data):
+            print(f"[KafkaMessenger] JSON enfileirado para o tópico '{self.topic}': {json_data}")
 
-class KafkaMessengerLocal:
+class KafkaMessengerLocal(KafkaMessenger):
     def __init__(self, topic, bootstrap_servers='localhost:29092'):
-        self.producer = KafkaProducer(
-            bootstrap_servers=bootstrap_servers,
-            value_serializer=lambda v: json.dumps(v).encode('utf-8')  # Serializa o JSON
-        )
-        self.topic = topic  # Tópico pode ser definido ao instanciar a classe
-    
-    def send_message(self, json_data):
-        """
-        Envia um JSON para o tópico Kafka.
-        :param json_data: Dicionário Python contendo o JSON a ser enviado.
-        """
-        self.producer.send(self.topic, json_data)
-        self.producer.flush()  # Garante que a mensagem seja enviada
-        print(f"[KafkaMessenger] JSON enviado para o tópico '{self.topic}': {json_data}")
+        super().__init__(topic, bootstrap_servers)
 
 class KafkaListener:
     def __init__(self, topic, bootstrap_servers='kafka:9092'):
@@ -94,6 +206,7 @@ if __name__ == "__main__":
     messenger = KafkaMessenger(topic=topic)  # Define o tópico dinamicamente
     json_to_send = {"passo1": True}  # JSON no formato solicitado
     messenger.send_message(json_to_send)
+    messenger.producer.flush(timeout=10)
 
     # Receber mensagens
     # listener = KafkaListener(topic=topic)  # Define o tópico dinamicamente
@@ -0,0 +1,153 @@
+from concurrent.futures import Future, InvalidStateError, TimeoutError
+import threading
+import logging
+import queue
+import time
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class InferenceService:
+    """
+    Serviço de inferência em lote para um modelo YOLO compartilhado.
+    Vários chamadores (câmeras, docas, sessões) enfileiram frames; uma única
+    thread por modelo agrupa as requisições e executa um forward em lote,
+    devolvendo cada resultado por um Future.
+
+    A instância pode ser usada no lugar do modelo: `service(frame, verbose=False)`
+    retorna a mesma lista de `Results` que `model(frame, verbose=False)`.
+
+    Só vale esperar por um lote quando há outros chamadores ativos: com uma
+    única doca inferindo, a requisição segue direto para o forward.
+    """
+
+    # Um chamador (thread) é considerado ativo se enviou frame nos últimos ACTIVE_WINDOW s
+    ACTIVE_WINDOW = 1.0
+
+    def __init__(self, model, max_batch_size=None, max_wait=None, name=None):
+        self.model = model
+        self.name = name or "modelo"
+        self.max_batch_size = max_batch_size or int(os.getenv("INFERENCE_MAX_BATCH", "8"))
+        if max_wait is None:
+            max_wait = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5")) / 1000.0
+        self.max_wait = max_wait
+        # Limite (s) para um chamador aguardar o resultado: worker travado vira erro no tracker
+        self.timeout = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+
+        self.batches = 0
+        self.frames = 0
+
+        self._submitters = {}  # {thread: último envio (monotonic)}
+        self._submitters_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def submit(self, frame, **kwargs):
+        """Enfileira um frame e retorna um Future com o `Results` correspondente."""
+        future = Future()
+        kwargs.setdefault("verbose", False)
+        with self._submitters_lock:
+            self._submitters[threading.get_ident()] = time.monotonic()
+        self._requests.put((frame, kwargs, future))
+        return future
+
+    def __call__(self, frame, **kwargs):
+        future = self.submit(frame, **kwargs)
+        try:
+            return [future.result(timeout=self.timeout)]
+        except TimeoutError:
+            future.cancel()  # Se ainda não entrou num forward, o worker a descarta
+            raise TimeoutError(f"[InferenceService] {self.name} sem resposta em {self.timeout:.0f}s")
+
+    def active_submitters(self):
+        """Quantidade de chamadores que enviaram frames recentemente (descarta os inativos)."""
+        cutoff = time.monotonic() - self.ACTIVE_WINDOW
+        with self._submitters_lock:
+            for thread, last in list(self._submitters.items()):
+                if last < cutoff:
+                    del self._submitters[thread]
+            return len(self._submitters)
+
+    def _collect_batch(self):
+        """
+        Bloqueia até a primeira requisição e agrupa as que chegarem em até
+        `max_wait`, esperando apenas enquanto houver chamador ativo fora do lote.
+        """
+        batch = [self._requests.get()]
+        expected = min(self.max_batch_size, max(1, self.active_submitters()))
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < expected:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._requests.get(timeout=remaining))
+                else:
+                    batch.append(self._requests.get_nowait())
+            except queue.Empty:
+                break
+        # O que já está na fila entra no lote sem espera
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                self._process(batch)
+            except Exception as e:
+                # Nenhuma falha pode derrubar o worker do modelo nem deixar chamadores esperando
+                logging.exception(f"[InferenceService] Erro no lote de {self.name}: {e}")
+                for _, _, future in batch:
+                    try:
+                        future.set_exception(e)
+                    except InvalidStateError:
+                        pass  # Já resolvida ou cancelada pelo chamador
+
+    def _process(self, batch):
+        """Executa um lote: um forward por grupo de parâmetros, resolvendo os Futures."""
+        # Requisições com parâmetros diferentes (imgsz, conf...) vão em forwards separados
+        groups = {}
+        for frame, kwargs, future in batch:
+            key = tuple(sorted(kwargs.items()))
+            groups.setdefault(key, []).append((frame, future))
+
+        for key, items in groups.items():
+            # Descarta requisições canceladas pelo chamador antes do forward
+            items = [(f, fut) for f, fut in items if fut.set_running_or_notify_cancel()]
+            if not items:
+                continue
+            frames = [frame for frame, _ in items]
+            futures = [future for _, future in items]
+            try:
+                results = self.model(frames, **dict(key))
+                if len(results) != len(frames):
+                    raise RuntimeError(f"{len(results)} resultados para {len(frames)} frames")
+            except Exception as e:
+                logging.error(f"[InferenceService] Erro na inferência de {self.name}: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.frames += len(frames)
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def stats(self):
+        """Tamanho médio de lote observado."""
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch": self.frames / self.batches if self.batches else 0.0,
+        }
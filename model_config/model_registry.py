@@ -0,0 +1,98 @@
+from ultralytics import YOLO
+from model_config.inference_service import InferenceService
+import numpy as np
+import threading
+import logging
+import os
+import torch
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class ModelRegistry:
+    """
+    Registro global (por processo) dos modelos YOLO.
+    Cada arquivo de pesos é carregado uma única vez e mantido residente no
+    device; os trackers recebem o mesmo handle em vez de recarregar o modelo
+    a cada troca de etapa. Com INFERENCE_BATCHING habilitado, o handle é um
+    InferenceService que agrupa em lote os frames de todos os chamadores.
+    """
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    _models = {}
+    _services = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, model_path, warmup=None):
+        """Retorna o handle compartilhado do modelo (serviço em lote ou o próprio YOLO)."""
+        if not cls._batching_enabled():
+            return cls.get_model(model_path, warmup=warmup)
+
+        key = os.path.abspath(model_path)
+        service = cls._services.get(key)
+        if service is not None:
+            return service
+
+        model = cls.get_model(model_path, warmup=warmup)
+        with cls._lock:
+            service = cls._services.get(key)
+            if service is None:
+                service = InferenceService(model, name=os.path.basename(model_path))
+                cls._services[key] = service
+        return service
+
+    @classmethod
+    def get_model(cls, model_path, warmup=None):
+        """Retorna o modelo YOLO já carregado para `model_path`, carregando-o na primeira chamada."""
+        if not model_path:
+            raise ValueError("[ModelRegistry] Caminho de modelo não definido.")
+
+        key = os.path.abspath(model_path)
+        model = cls._models.get(key)
+        if model is not None:
+            return model
+
+        with cls._lock:
+            model = cls._models.get(key)
+            if model is None:
+                logging.info(
+                    f"[ModelRegistry] Carregando modelo {model_path} no device {cls.device}"
+                )
+                model = YOLO(model_path).to(cls.device)
+                if warmup is None:
+                    warmup = cls._warmup_enabled()
+                if warmup:
+                    cls.warmup(model)
+                cls._models[key] = model
+        return model
+
+    @classmethod
+    def preload(cls, model_paths, warmup=None):
+        """Carrega (e aquece) todos os modelos informados, ignorando caminhos vazios."""
+        for model_path in model_paths:
+            if model_path:
+                cls.get(model_path, warmup=warmup)
+
+    @classmethod
+    def warmup(cls, model, imgsz=640):
+        """Executa uma inferência em um frame vazio para inicializar kernels/cudnn."""
+        dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        try:
+            model(dummy, verbose=False)
+        except Exception as e:
+            logging.warning(f"[ModelRegistry] Falha no warm-up do modelo: {e}")
+
+    @classmethod
+    def loaded(cls):
+        """Lista os caminhos dos modelos residentes."""
+        return list(cls._models.keys())
+
+    @staticmethod
+    def _batching_enabled():
+        return os.getenv("INFERENCE_BATCHING", "True").lower() not in ("0", "false", "no")
+
+    @staticmethod
+    def _warmup_enabled():
+        return os.getenv("MODEL_WARMUP", "True").lower() not in ("0", "false", "no")
@@ -0,0 +1,279 @@
+import json
+import os
+import re
+import threading
+from processes.startTracker import StartTracker
+from processes.macacaoTracker import MacacaoTracker
+from processes.palletTracker import PalletTracker
+from processes.pacoteTracker import PacoteTracker
+from processes.stretchTracker import StretchTracker
+from processes.finishTracker import FinishTracker
+from processes.labelPolpaTracker import LabelPolpaTracker
+from processes.pacotePolpaTracker import PacotePolpaTracker
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Tipos de passo: classe do tracker, rede (MODEL_REDEx), variável da câmera,
+# chaves de "timeouts" e chaves de "required_times" lidas pelo tracker
+STEP_TYPES = {
+    "StartTracker": (StartTracker, "rede1", "VIDEO_PATH_START", ("spectingStart",), ("spectingStart",)),
+    "MacacaoTracker": (
+        MacacaoTracker,
+        "rede3",
+        "VIDEO_PATH_MACACAO",
+        ("spectingMacacao",),
+        ("spectingMacacao",),
+    ),
+    "PalletTracker": (
+        PalletTracker,
+        "rede2",
+        "VIDEO_PATH_PALLET",
+        ("spectingPalletColor", "spectingPalletClass"),
+        ("spectingPalletColor", "spectingPalletClass"),
+    ),
+    "PacoteTracker": (PacoteTracker, "rede1", "VIDEO_PATH_PACOTE", ("spectingPacotes",), ("spectingPacotes",)),
+    "StretchTracker": (StretchTracker, "rede4", "VIDEO_PATH_STRETCH", ("spectingStrech",), ("spectingStrech",)),
+    "FinishTracker": (FinishTracker, "rede1", "VIDEO_PATH_FINISH", ("spectingFinish",), ("spectingFinish",)),
+    "LabelPolpaTracker": (
+        LabelPolpaTracker,
+        "rede6",
+        "VIDEO_PATH_LABEL",
+        ("spectingLabelPolpa",),
+        ("spectingLabelPolpa",),
+    ),
+    "PacotePolpaTracker": (
+        PacotePolpaTracker,
+        "rede1",
+        "VIDEO_PATH_PACOTE_POLPA",
+        ("spectingPacotes",),
+        ("presença_polpa", "ausencia_polpa"),
+    ),
+}
+
+# Rede (MODEL_REDEx) usada por cada tracker
+TRACKER_MODELS = {name: step_type[1] for name, step_type in STEP_TYPES.items()}
+
+# Variável de ambiente com a câmera usada por cada tracker
+VIDEO_PATH_VARS = {name: step_type[2] for name, step_type in STEP_TYPES.items()}
+
+# Procedimentos de polpa usam o passo de pacotes de polpa no lugar do de pacotes comum
+POLPA_SUBSTITUTIONS = {"PacoteTracker": "PacotePolpaTracker"}
+
+# Referência a um resultado de tracker: "self.palletTracker.statusPassoCollor"
+_FIELD_RE = re.compile(r"^self\.([A-Za-z_]\w*)\.([A-Za-z_]\w*)$")
+_STEP_RE = re.compile(r"^(?:self\.)?([A-Za-z_]\w*)$")
+
+
+class ProcedureConfigError(ValueError):
+    """Definição de procedimento inválida em procedimentos.json."""
+
+
+class ProcedureStep:
+    """
+    Um passo compilado do procedimento: classe do tracker, rede, câmera e a
+    configuração que o tracker recebe (timeouts, tempos requeridos e taxas
+    de inferência da sua CONFIG_KEY).
+    """
+
+    __slots__ = (
+        "name",
+        "tracker_class",
+        "model",
+        "video_path_var",
+        "timeouts",
+        "required_times",
+        "inference_rates",
+    )
+
+    def __init__(self, name, config):
+        self.name = name
+        self.tracker_class, self.model, self.video_path_var, timeout_keys, required_keys = STEP_TYPES[name]
+        self.timeouts = {key: config.timeouts[key] for key in timeout_keys}
+        self.required_times = {key: config.required_times[key] for key in required_keys}
+        self.inference_rates = config.inference_rates.get(self.tracker_class.CONFIG_KEY)
+
+    def __repr__(self):
+        return f"ProcedureStep({self.name})"
+
+
+class ResultField:
+    """Referência compilada a um atributo de resultado (RESULT_FIELDS) de um tracker."""
+
+    __slots__ = ("tracker", "attribute")
+
+    def __init__(self, tracker, attribute):
+        self.tracker = tracker
+        self.attribute = attribute
+
+    def read(self, results, default=None):
+        """Valor do campo nos resultados coletados ({tracker: {atributo: valor}})."""
+        return results.get(self.tracker, {}).get(self.attribute, default)
+
+    def __repr__(self):
+        return f"{self.tracker}.{self.attribute}"
+
+
+class ProcedurePlan:
+    """
+    Procedimento compilado: parâmetros esperados, passos em ordem e os campos
+    de resultado que compõem as etapas e os alertas gravados no banco.
+    """
+
+    __slots__ = (
+        "name",
+        "expected_macacao_color",
+        "expected_pallet_color",
+        "expected_pallet_class",
+        "steps",
+        "etapas",
+        "alertas",
+    )
+
+    def __init__(self, name, info, steps, etapas, alertas):
+        self.name = name
+        self.expected_macacao_color = info["expected_macacao_color"]
+        self.expected_pallet_color = info["expected_pallet_color"]
+        self.expected_pallet_class = info["expected_pallet_class"]
+        self.steps = tuple(steps)
+        self.etapas = tuple(etapas)
+        self.alertas = tuple(alertas)
+
+    @property
+    def step_names(self):
+        return [step.name for step in self.steps]
+
+    def collect_etapas(self, results):
+        """Status das etapas (None para etapas sem campo ou passos não executados)."""
+        return [field.read(results) if field is not None else None for field in self.etapas]
+
+    def collect_alertas(self, results):
+        """Concatenação dos alertas dos passos executados."""
+        return "".join(field.read(results, "") for field in self.alertas)
+
+
+class ProcedureConfig:
+    """
+    Definições de procedimento (JSON_PATH) validadas e compiladas uma única vez
+    por processo em ProcedurePlans indexados por nome. Erros de configuração
+    (tracker ou campo desconhecido, expressão mal formada, chave ausente)
+    interrompem o carregamento com ProcedureConfigError.
+    """
+
+    _configs = {}
+    _lock = threading.Lock()
+
+    def __init__(self, data):
+        self.data = data
+        try:
+            self.timeouts = data["timeouts"][0]
+            self.required_times = data["required_times"][0]
+            self.inference_rates = data.get("inference_rates", [{}])[0]
+            procedures = data["procedimentos"]
+        except (KeyError, IndexError, TypeError) as e:
+            raise ProcedureConfigError(f"Seção obrigatória ausente: {e}") from e
+
+        self.plans = {}
+        for procedure in procedures:
+            plan = self._compile(procedure)
+            if plan.name in self.plans:
+                raise ProcedureConfigError(f"Procedimento duplicado: '{plan.name}'")
+            self.plans[plan.name] = plan
+
+    @classmethod
+    def load(cls, path=None):
+        """Retorna a configuração compilada de `path` (padrão: JSON_PATH), lendo o arquivo só na primeira vez."""
+        path = os.path.abspath(path or os.getenv("JSON_PATH"))
+        config = cls._configs.get(path)
+        if config is not None:
+            return config
+
+        with cls._lock:
+            config = cls._configs.get(path)
+            if config is None:
+                with open(path, "r", encoding="utf-8") as file:
+                    config = cls(json.load(file))
+                cls._configs[path] = config
+        return config
+
+    def get(self, procedure_name):
+        """Plano do procedimento, ou None se não existir."""
+        return self.plans.get(procedure_name)
+
+    def __contains__(self, procedure_name):
+        return procedure_name in self.plans
+
+    def step(self, tracker_name):
+        """Passo avulso (fora de um procedimento) do tracker, com a configuração deste arquivo."""
+        if tracker_name not in STEP_TYPES:
+            raise ProcedureConfigError(f"Tracker desconhecido: {tracker_name!r}")
+        try:
+            return ProcedureStep(tracker_name, self)
+        except KeyError as e:
+            raise ProcedureConfigError(f"[{tracker_name}] Campo obrigatório ausente: {e}") from e
+
+    def _compile(self, procedure):
+        name = procedure.get("nome")
+        if not name:
+            raise ProcedureConfigError(f"Procedimento sem nome: {procedure}")
+
+        try:
+            info = {}
+            for entry in procedure["info"]:
+                info.update(entry)
+            plan = ProcedurePlan(
+                name,
+                info,
+                self._compile_steps(name, procedure["ordem"]),
+                self._compile_etapas(name, procedure["db_command_etapas"]),
+                self._compile_alertas(name, procedure["db_command_alertas"]),
+            )
+        except KeyError as e:
+            raise ProcedureConfigError(f"[{name}] Campo obrigatório ausente: {e}") from e
+        return plan
+
+    def _compile_steps(self, name, ordem):
+        steps = []
+        for item in ordem.strip().strip("[]").split(","):
+            item = item.strip()
+            if not item:
+                continue
+            match = _STEP_RE.match(item)
+            if match is None:
+                raise ProcedureConfigError(f"[{name}] Passo mal formado em 'ordem': {item!r}")
+            step_name = self._tracker_name(name, match.group(1))
+            if "polpa" in name:
+                step_name = POLPA_SUBSTITUTIONS.get(step_name, step_name)
+            steps.append(ProcedureStep(step_name, self))
+        if not steps:
+            raise ProcedureConfigError(f"[{name}] 'ordem' não contém passos.")
+        return steps
+
+    def _compile_etapas(self, name, expression):
+        etapas = []
+        for item in expression.strip().strip("[]").split(","):
+            item = item.strip()
+            etapas.append(None if item == "None" else self._compile_field(name, item))
+        return etapas
+
+    def _compile_alertas(self, name, expression):
+        return [self._compile_field(name, item.strip()) for item in expression.split("+")]
+
+    def _compile_field(self, name, item):
+        match = _FIELD_RE.match(item)
+        if match is None:
+            raise ProcedureConfigError(f"[{name}] Campo de resultado mal formado: {item!r}")
+        tracker = self._tracker_name(name, match.group(1))
+        attribute = match.group(2)
+        if attribute not in STEP_TYPES[tracker][0].RESULT_FIELDS:
+            raise ProcedureConfigError(f"[{name}] {tracker} não possui o resultado '{attribute}'.")
+        return ResultField(tracker, attribute)
+
+    @staticmethod
+    def _tracker_name(name, instance_name):
+        """'palletTracker' -> 'PalletTracker', validando contra os tipos de passo conhecidos."""
+        tracker = instance_name[0].upper() + instance_name[1:]
+        if tracker not in STEP_TYPES:
+            raise ProcedureConfigError(f"[{name}] Tracker desconhecido: {instance_name!r}")
+        return tracker
@@ -0,0 +1,216 @@
+import cv2
+import os
+from datetime import datetime
+from kafka_config.kafka_config import KafkaMessenger
+from model_config.model_registry import ModelRegistry
+from processes.detections import Detections
+from processes.inference_scheduler import InferenceScheduler
+from processes.motion_gate import MotionGate
+from processes.roi_inference import RoiInference
+from video_config.stamped_frame import frame_time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GREEN = (0, 255, 0)
+RED = (0, 0, 255)
+BLUE = (255, 0, 0)
+
+FRAME_SIZE = (640, 640)
+
+
+class BaseTracker:
+    """
+    Base dos trackers de etapa. Cada frame passa pelo mesmo pipeline:
+
+        preprocess -> infer -> postprocess -> decide -> draw
+
+    As etapas comuns (redimensionamento, inferência agendada na ROI, cópia
+    para o overlay só quando há quem assista) ficam aqui; cada tracker
+    implementa `postprocess` (filtra as detecções que interessam), `decide`
+    (regras de tempo/estado e mensagens) e `draw` (overlay).
+
+    A configuração vem do passo compilado do procedimento (ProcedureStep):
+    timeouts, tempos requeridos e taxas de inferência da CONFIG_KEY.
+
+    Atributos de classe:
+        NAME: prefixo dos logs.
+        STEP: texto do passo enviado no tópico 'passos'.
+        CONFIG_KEY: chave do tracker em timeouts/required_times/inference_rates.
+        RESULT_FIELDS: (status, alerta, ...) lidos pelo orquestrador ao final.
+        MOTION_GATE: pré-filtro de movimento nas ROIs de inferência.
+        LAZY_MODEL: obtém o modelo só na primeira inferência.
+    """
+
+    NAME = "BaseTracker"
+    STEP = None
+    CONFIG_KEY = None
+    RESULT_FIELDS = ()
+    MOTION_GATE = False
+    LAZY_MODEL = False
+
+    def __init__(self, model_path, step):
+        self.device = ModelRegistry.device
+        print(f"[{self.NAME}] Using device: {self.device}")
+
+        # Modelo compartilhado: carregado uma única vez pelo ModelRegistry
+        self.model_path = model_path
+        self.model = None
+        self.roi_inference = None
+        if not self.LAZY_MODEL:
+            self.ensure_model()
+
+        self.messenger_passos = KafkaMessenger(topic="passos")
+        self.messenger_alertas = KafkaMessenger(topic="alertas")
+
+        self.step = step
+        self.timeouts = step.timeouts
+        self.required_times = step.required_times
+
+        # Cadência de inferência do passo (procedimentos.json -> inference_rates)
+        rois = self.inference_rois()
+        gate = MotionGate(rois) if self.MOTION_GATE and rois else None
+        self.scheduler = InferenceScheduler.from_rates(step.inference_rates, gate=gate)
+
+        # Desenha o overlay só quando o frame vai ser exibido (definido pelo orquestrador)
+        self.annotate = True
+        self.isSpecting = True
+        self.timeout_start = None
+
+    @classmethod
+    def from_plan(cls, model_path, step, plan):
+        """Cria o tracker do passo `step` com os parâmetros esperados do procedimento `plan`."""
+        return cls(model_path, step)
+
+    @classmethod
+    def skipped_result(cls):
+        """Resultado de um passo pulado por não ter efeito no procedimento: aprovado e sem alerta."""
+        return {field: "" if field.startswith("alert") else True for field in cls.RESULT_FIELDS}
+
+    def inference_rois(self):
+        """ROIs (x, y, w, h) às quais a inferência se limita; None infere no frame inteiro."""
+        return None
+
+    def ensure_model(self):
+        if self.model is None:
+            self.model = ModelRegistry.get(self.model_path)
+            rois = self.inference_rois()
+            if rois:
+                # Inferência apenas no recorte das ROIs (ROI_INFERENCE)
+                self.roi_inference = RoiInference(self.model, rois)
+
+    def detect(self, frame):
+        return Detections.from_results(self.model(frame, verbose=False), self.model.names)
+
+    # --- Pipeline por frame ---
+
+    def process_video(self, frame):
+        if frame is None or not self.isSpecting:
+            return frame
+        try:
+            # Todas as decisões temporais usam o instante de captura do frame
+            now = frame_time(frame)
+            if self.timeout_start is None:
+                self.timeout_start = now
+
+            image = self.preprocess(frame)
+            detections = self.infer(image, now)
+            result = self.postprocess(detections)
+            self.decide(result, image, now)
+
+            if not self.annotate:
+                return image
+            # `frame` é uma view do ring da captura: desenha numa cópia se não houve redimensionamento
+            output = image.copy() if image is frame else image
+            self.draw(output, result)
+            return output
+        except Exception as e:
+            return self.on_error(e, frame)
+
+    def preprocess(self, frame):
+        if frame.shape[:2] != FRAME_SIZE:
+            frame = cv2.resize(frame, FRAME_SIZE)
+        return frame
+
+    def infer(self, frame, now):
+        self.ensure_model()
+        infer = self.roi_inference if self.roi_inference is not None else self.detect
+        return self.scheduler.run(infer, frame, now)
+
+    def postprocess(self, detections):
+        return detections
+
+    def decide(self, result, frame, now):
+        raise NotImplementedError
+
+    def draw(self, frame, result):
+        pass
+
+    def on_error(self, error, frame):
+        print(f"[{self.NAME}] Error processing frame: {error}")
+        return frame
+
+    # --- Auxiliares de decisão ---
+
+    def timed_out(self, now, key=None):
+        """Se o tempo desde o início da etapa passou do timeout configurado (menos 1 s)."""
+        return now - self.timeout_start > self.timeouts[key or self.CONFIG_KEY] - 1
+
+    def send_step(self, status, **extra):
+        self.messenger_passos.send_message({self.STEP: status, **extra})
+
+    def send_alert(self, message, alert_type="info"):
+        self.messenger_alertas.send_message(
+            {"alerta": True, "type": alert_type, "message": message}
+        )
+
+    def finish(self, status, alert=None, alert_message=None, alert_type="info", frame=None):
+        """Encerra a etapa: grava status/alerta, publica o passo e, se houver, o alerta e o snapshot."""
+        status_field, alert_field = self.RESULT_FIELDS[:2]
+        setattr(self, status_field, status)
+        if alert is not None:
+            setattr(self, alert_field, alert)
+        self.send_step(status)
+        self.isSpecting = False
+        if alert_message:
+            self.send_alert(alert_message, alert_type)
+        if frame is not None:
+            self.save_frame(frame)
+
+    def skip(self, skipJustification):
+        print(f"[{self.NAME}] Etapa avançada via comando skip.")
+        setattr(self, self.RESULT_FIELDS[0], True)
+        self.send_step(True, skip=True, justification=skipJustification)
+        self.isSpecting = False
+
+    def save_frame(self, frame):
+        if os.getenv("SAVE_RESULTS"):
+            filename = os.path.join(os.getenv("SAVE_PATH"), f"{datetime.now()}.jpg")
+            print(f"[{self.NAME}] Saving file: {filename}")
+            cv2.imwrite(filename, frame)
+
+    # --- Auxiliares de overlay ---
+
+    @staticmethod
+    def draw_roi(frame, roi, text, color=RED, thickness=2):
+        x, y, w, h = roi
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+        cv2.putText(
+            frame, text, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, thickness
+        )
+
+    @staticmethod
+    def draw_detections(
+        frame, detections, color=GREEN, text="{label} {conf:.2f}", font_scale=0.5, thickness=2
+    ):
+        for (x1, y1, x2, y2), conf, label in detections:
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(
+                frame,
+                text.format(label=label, conf=conf),
+                (x1, y1 - 10),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                font_scale,
+                color,
+                thickness,
+            )
@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class ColorClassifier:
+    """
+    Classificador de cor dominante de uma ROI contra uma paleta fixa (BGR).
+    A paleta é pré-convertida para um array (K, 3) no espaço de comparação
+    ("bgr", padrão, em que a paleta foi calibrada, ou "lab", opcional e só
+    com uma paleta recalibrada em LAB); a média da ROI é tirada de uma versão
+    subamostrada (passo `step`) e suavizada no tempo por média móvel
+    exponencial. Para não oscilar entre cores vizinhas, o rótulo atual só é
+    trocado quando a nova cor vence por pelo menos `switch_margin`.
+    """
+
+    def __init__(self, palette, space=None, smoothing=None, step=None, switch_margin=None):
+        self.names = list(palette.keys())
+        self.space = (space or os.getenv("COLOR_SPACE", "bgr")).lower()
+        self.smoothing = smoothing if smoothing is not None else float(os.getenv("COLOR_SMOOTHING", "0.3"))
+        self.step = step or int(os.getenv("COLOR_SAMPLE_STEP", "4"))
+        self.switch_margin = (
+            switch_margin if switch_margin is not None else float(os.getenv("COLOR_SWITCH_MARGIN", "0.1"))
+        )
+
+        bgr = np.array([palette[name] for name in self.names], dtype=np.uint8)
+        self.palette = self._convert(bgr)
+
+        self.color = None  # Cor média suavizada, no espaço de comparação
+        self.label = None
+        self.margin = 0.0
+
+    def _convert(self, bgr):
+        """Converte cores BGR (N, 3) uint8 para o espaço de comparação (float32)."""
+        if self.space == "lab":
+            return cv2.cvtColor(bgr.reshape(1, -1, 3), cv2.COLOR_BGR2LAB).reshape(-1, 3).astype(np.float32)
+        return bgr.astype(np.float32)
+
+    def mean_color(self, frame, roi):
+        """Média BGR da ROI (x, y, w, h), calculada sobre uma grade subamostrada."""
+        x, y, w, h = roi
+        sample = frame[y : y + h : self.step, x : x + w : self.step]
+        return sample.reshape(-1, 3).mean(axis=0)
+
+    def nearest(self, color):
+        """
+        (índice, margem, distâncias) da cor da paleta mais próxima de `color` (já no
+        espaço de comparação); `distâncias` traz a distância para cada cor da paleta.
+        """
+        distances = np.linalg.norm(self.palette - color, axis=1)
+        order = np.argsort(distances)
+        best, second = distances[order[0]], distances[order[1]] if len(order) > 1 else np.inf
+        margin = float((second - best) / second) if np.isfinite(second) and second > 0 else 1.0
+        return int(order[0]), margin, distances
+
+    def classify(self, frame, roi):
+        """Retorna (nome da cor, margem de confiança em [0, 1]) para a ROI no frame atual."""
+        mean_bgr = np.clip(np.rint(self.mean_color(frame, roi)), 0, 255).astype(np.uint8)
+        color = self._convert(mean_bgr.reshape(1, 3))[0]
+        if self.color is None:
+            self.color = color
+        else:
+            self.color = self.smoothing * color + (1.0 - self.smoothing) * self.color
+
+        best, margin, distances = self.nearest(self.color)
+        if self.label is not None and self.names[best] != self.label:
+            current = distances[self.names.index(self.label)]
+            # Histerese: só troca se a nova cor estiver claramente mais próxima
+            if current > 0 and (current - distances[best]) / current < self.switch_margin:
+                best = self.names.index(self.label)
+                margin = 0.0
+
+        self.label = self.names[best]
+        self.margin = margin
+        return self.label, margin
+
+    def reset(self):
+        self.color = None
+        self.label = None
+        self.margin = 0.0
@@ -0,0 +1,126 @@
+import numpy as np
+
+
+class Detections:
+    """
+    Detecções de um frame em arrays numpy contíguos.
+    `xyxy` (N, 4), `conf` (N,) e `cls` (N,) são extraídos do resultado do
+    YOLO uma única vez (uma só cópia device -> host), e os filtros, testes
+    de ROI e de contenção são operações vetorizadas sobre esses arrays,
+    de modo que o custo não cresce com laços Python por caixa.
+    """
+
+    def __init__(self, xyxy, conf, cls, names):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.int64).reshape(-1)
+        self.names = names  # {id: nome}
+
+    @classmethod
+    def from_results(cls, results, names=None):
+        """Converte a lista de `Results` do YOLO (boxes.data = [x1, y1, x2, y2, conf, cls])."""
+        arrays = []
+        for result in results:
+            if names is None:
+                names = result.names
+            data = result.boxes.data
+            if len(data):
+                arrays.append(data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data))
+
+        if not arrays:
+            return cls.empty(names or {})
+        data = np.concatenate(arrays) if len(arrays) > 1 else arrays[0]
+        return cls(data[:, :4], data[:, -2], data[:, -1], names)
+
+    @classmethod
+    def empty(cls, names=None):
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0), names or {})
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __getitem__(self, index):
+        """Subconjunto por máscara booleana, índices ou slice."""
+        return Detections(self.xyxy[index], self.conf[index], self.cls[index], self.names)
+
+    def __iter__(self):
+        """Itera (caixa em int, confiança, rótulo) — para desenho e lógica por objeto."""
+        boxes = self.xyxy.astype(np.int32)
+        for box, conf, cls_id in zip(boxes.tolist(), self.conf.tolist(), self.cls.tolist()):
+            yield tuple(box), conf, self.names[cls_id]
+
+    @property
+    def labels(self):
+        return [self.names[cls_id] for cls_id in self.cls.tolist()]
+
+    # Filtros -----------------------------------------------------------------
+
+    def class_ids(self, labels):
+        return [cls_id for cls_id, name in self.names.items() if name in labels]
+
+    def of_class(self, labels):
+        """Máscara das detecções cujos rótulos estão em `labels`."""
+        if isinstance(labels, str):
+            labels = (labels,)
+        return np.isin(self.cls, self.class_ids(labels))
+
+    def name_contains(self, substring):
+        """Máscara das detecções cujo rótulo contém `substring` (ex.: 'pallet')."""
+        return np.isin(self.cls, [i for i, name in self.names.items() if substring in name])
+
+    def min_conf(self, threshold):
+        return self.conf >= threshold
+
+    def filter(self, labels=None, min_conf=None):
+        mask = np.ones(len(self), dtype=bool)
+        if labels is not None:
+            mask &= self.of_class(labels)
+        if min_conf is not None:
+            mask &= self.min_conf(min_conf)
+        return self[mask]
+
+    # Geometria ---------------------------------------------------------------
+
+    def offset(self, dx, dy):
+        """Cópia com as caixas deslocadas (ex.: de coordenadas do recorte para o frame)."""
+        xyxy = self.xyxy + np.array([dx, dy, dx, dy], dtype=np.float32)
+        return Detections(xyxy, self.conf, self.cls, self.names)
+
+    def centers(self):
+        """Centros inteiros (N, 2), com o mesmo arredondamento de `(x1 + x2) // 2` em caixas int."""
+        boxes = self.xyxy.astype(np.int32)
+        return np.stack(
+            ((boxes[:, 0] + boxes[:, 2]) // 2, (boxes[:, 1] + boxes[:, 3]) // 2), axis=1
+        )
+
+    def center_in_roi(self, roi):
+        """Máscara das caixas cujo centro está na ROI (x, y, w, h), bordas inclusas."""
+        roi_x, roi_y, roi_w, roi_h = roi
+        centers = self.centers()
+        return (
+            (centers[:, 0] >= roi_x)
+            & (centers[:, 0] <= roi_x + roi_w)
+            & (centers[:, 1] >= roi_y)
+            & (centers[:, 1] <= roi_y + roi_h)
+        )
+
+    def inside_roi(self, roi):
+        """Máscara das caixas inteiramente contidas na ROI (x, y, w, h)."""
+        roi_x, roi_y, roi_w, roi_h = roi
+        return (
+            (self.xyxy[:, 0] >= roi_x)
+            & (self.xyxy[:, 1] >= roi_y)
+            & (self.xyxy[:, 2] <= roi_x + roi_w)
+            & (self.xyxy[:, 3] <= roi_y + roi_h)
+        )
+
+    def contains(self, other):
+        """Matriz (N, M): True se a caixa i desta instância contém a caixa j de `other`."""
+        outer = self.xyxy.astype(np.int32)[:, None, :]
+        inner = other.xyxy.astype(np.int32)[None, :, :]
+        return (
+            (inner[..., 0] >= outer[..., 0])
+            & (inner[..., 1] >= outer[..., 1])
+            & (inner[..., 2] <= outer[..., 2])
+            & (inner[..., 3] <= outer[..., 3])
+        )
@@ -0,0 +1,100 @@
+import time
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class InferenceScheduler:
+    """
+    Cadência de inferência de um tracker.
+    Roda o detector a `idle_rate` inferências/s enquanto a cena está estável e
+    sobe para `active_rate` quando algo muda (contagem de classes diferente da
+    última inferência ou `wake()` chamado pelo tracker), mantendo a taxa alta
+    por `active_hold` segundos. Entre inferências, `run` devolve as últimas
+    detecções, que seguem alimentando a lógica e o overlay do tracker.
+
+    As taxas vêm da chave "inference_rates" do procedimentos.json; sem
+    configuração para o tracker (ou com INFERENCE_SCHEDULER=False), infere
+    em todo frame. Com um `gate` (MotionGate), a inferência devida só roda
+    se houve movimento nas ROIs desde a anterior.
+    """
+
+    def __init__(self, idle_rate=None, active_rate=None, active_hold=2.0, gate=None):
+        self.idle_rate = idle_rate
+        self.active_rate = active_rate or idle_rate
+        self.active_hold = active_hold
+        self.gate = gate
+        self.enabled = bool(idle_rate) and os.getenv(
+            "INFERENCE_SCHEDULER", "True"
+        ).lower() not in ("0", "false", "no")
+
+        self.last = None  # Últimas detecções
+        self.fresh = False  # Se a última chamada de run() rodou o detector (False = detecções reaproveitadas)
+        self.inferences = 0
+        self.reused = 0
+        self._signature = None
+        self._active_until = 0.0
+        self._next_time = 0.0
+
+    @classmethod
+    def from_rates(cls, rates, gate=None):
+        """Cria o scheduler a partir das taxas do passo: {"idle": Hz, "active": Hz, "active_hold": s}."""
+        rates = rates or {}
+        return cls(
+            idle_rate=rates.get("idle"),
+            active_rate=rates.get("active"),
+            active_hold=rates.get("active_hold", 2.0),
+            gate=gate,
+        )
+
+    def wake(self, now=None):
+        """Sinaliza que uma mudança é provável (troca de fase, movimento): infere já, em taxa alta."""
+        now = time.monotonic() if now is None else now
+        self._active_until = now + self.active_hold
+        self._next_time = now
+
+    def run(self, infer, frame, now=None):
+        """
+        Retorna `infer(frame)` quando é hora de inferir; senão, as últimas detecções.
+        `now` é o instante do frame (carimbo de captura), para que a cadência
+        acompanhe o tempo do vídeo e não o do processamento.
+        """
+        now = time.monotonic() if now is None else now
+        if self.last is not None:
+            if self.enabled and now < self._next_time:
+                self.reused += 1
+                self.fresh = False
+                return self.last
+            if self.gate is not None and not self.gate.changed(frame, now):
+                # Cena parada nas ROIs: mantém o estado anterior e reagenda
+                self.reused += 1
+                self.fresh = False
+                self._schedule(now)
+                return self.last
+
+        detections = infer(frame)
+        self.inferences += 1
+        self.fresh = True
+        if self.gate is not None:
+            self.gate.reset(frame, now)
+
+        signature = tuple(sorted(detections.cls.tolist()))
+        if signature != self._signature:
+            self._active_until = now + self.active_hold
+        self._signature = signature
+        self.last = detections
+
+        self._schedule(now)
+        return detections
+
+    def _schedule(self, now):
+        if self.enabled:
+            rate = self.active_rate if now < self._active_until else self.idle_rate
+            self._next_time = now + 1.0 / rate
+
+    def stats(self):
+        stats = {"inferences": self.inferences, "reused": self.reused}
+        if self.gate is not None:
+            stats["motion_skipped"] = self.gate.skipped
+        return stats
@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+import time
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class MotionGate:
+    """
+    Pré-filtro de movimento restrito às ROIs de um tracker.
+    Compara uma versão reduzida e em tons de cinza das ROIs com a referência
+    gravada na última inferência; se a fração de pixels alterados ficar abaixo
+    de `min_changed`, a inferência pode ser pulada e o estado anterior mantido.
+    Após `max_idle` segundos sem inferir, libera uma inferência de qualquer
+    forma. `skipped` conta as inferências economizadas.
+    """
+
+    def __init__(
+        self,
+        rois,
+        scale=None,
+        pixel_threshold=None,
+        min_changed=None,
+        max_idle=None,
+        enabled=None,
+    ):
+        self.rois = [tuple(roi) for roi in rois]  # [(x, y, w, h)]
+        # `is not None`: 0 é um valor válido (ex.: min_changed=0 infere a qualquer mudança)
+        self.scale = scale if scale is not None else float(os.getenv("MOTION_GATE_SCALE", "0.25"))
+        self.pixel_threshold = (
+            pixel_threshold if pixel_threshold is not None else int(os.getenv("MOTION_PIXEL_THRESHOLD", "25"))
+        )
+        self.min_changed = min_changed if min_changed is not None else float(os.getenv("MOTION_MIN_CHANGED", "0.01"))
+        self.max_idle = max_idle if max_idle is not None else float(os.getenv("MOTION_MAX_IDLE", "5.0"))
+        if enabled is None:
+            enabled = os.getenv("MOTION_GATE", "True").lower() not in ("0", "false", "no")
+        self.enabled = enabled and bool(self.rois)
+
+        self.checks = 0
+        self.skipped = 0
+        self._reference = None
+        self._reference_time = 0.0
+        self._mask = None
+        self._box = None
+
+    def _crop_box(self, frame_shape):
+        height, width = frame_shape[:2]
+        x1 = max(0, min(x for x, _, _, _ in self.rois))
+        y1 = max(0, min(y for _, y, _, _ in self.rois))
+        x2 = min(width, max(x + w for x, _, w, _ in self.rois))
+        y2 = min(height, max(y + h for _, y, _, h in self.rois))
+        return x1, y1, x2, y2
+
+    def _build_mask(self, frame_shape):
+        """Máscara (na escala reduzida) dos pixels que pertencem a alguma ROI."""
+        self._box = self._crop_box(frame_shape)
+        x1, y1, x2, y2 = self._box
+        size = (max(1, int((x2 - x1) * self.scale)), max(1, int((y2 - y1) * self.scale)))
+        mask = np.zeros((size[1], size[0]), dtype=bool)
+        for x, y, w, h in self.rois:
+            mx1, my1 = int((x - x1) * self.scale), int((y - y1) * self.scale)
+            mx2, my2 = int((x + w - x1) * self.scale), int((y + h - y1) * self.scale)
+            mask[max(0, my1):my2, max(0, mx1):mx2] = True
+        self._mask = mask
+        self._mask_count = max(1, int(mask.sum()))
+
+    def _prepare(self, frame):
+        if self._box is None:
+            self._build_mask(frame.shape)
+        x1, y1, x2, y2 = self._box
+        small = cv2.resize(
+            frame[y1:y2, x1:x2],
+            (self._mask.shape[1], self._mask.shape[0]),
+            interpolation=cv2.INTER_AREA,
+        )
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def changed(self, frame, now=None):
+        """True se houve movimento nas ROIs desde a última referência (ou se ela expirou)."""
+        if not self.enabled or self._reference is None:
+            return True
+        now = time.monotonic() if now is None else now
+        if now - self._reference_time >= self.max_idle:
+            return True
+
+        self.checks += 1
+        diff = cv2.absdiff(self._prepare(frame), self._reference)
+        moving = np.count_nonzero((diff > self.pixel_threshold) & self._mask)
+        if moving / self._mask_count >= self.min_changed:
+            return True
+
+        self.skipped += 1
+        return False
+
+    def reset(self, frame, now=None):
+        """Grava o frame que acabou de ser inferido como nova referência."""
+        if not self.enabled:
+            return
+        self._reference = self._prepare(frame)
+        self._reference_time = time.monotonic() if now is None else now
@@ -0,0 +1,151 @@
+import numpy as np
+import time
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy é opcional: sem ele usa a associação gulosa
+    linear_sum_assignment = None
+
+
+def box_iou(a, b):
+    """Matriz (N, M) de IoU entre as caixas xyxy de `a` (N, 4) e `b` (M, 4)."""
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+def box_centers(boxes):
+    return np.stack(
+        ((boxes[:, 0] + boxes[:, 2]) / 2.0, (boxes[:, 1] + boxes[:, 3]) / 2.0), axis=1
+    )
+
+
+class ObjectTracker:
+    """
+    Rastreador multiobjeto para as caixas de um tracker (ex.: pacotes).
+    A cada `update`, prevê a posição das trilhas por um modelo de velocidade
+    constante, monta de uma vez a matriz de custo (1 - IoU + distância entre
+    centros normalizada) e associa detecções a trilhas pelo algoritmo húngaro
+    (scipy) ou, na falta dele, de forma gulosa. Pares com centros a mais de
+    `max_distance` px e sem sobreposição não são associados.
+
+    Trilhas sem detecção por `max_age` segundos expiram; acima de `max_tracks`
+    as menos recentes são descartadas. Os IDs removidos ficam disponíveis em
+    `pop_removed()` para quem mantém estado por ID.
+    """
+
+    def __init__(self, max_distance=50.0, max_age=10.0, max_tracks=50, velocity_alpha=0.5):
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.max_tracks = max_tracks
+        self.velocity_alpha = velocity_alpha  # Suavização exponencial da velocidade
+
+        # Trilhas ativas, em arrays paralelos
+        self.ids = np.empty(0, dtype=np.int64)
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.velocities = np.empty((0, 2), dtype=np.float32)  # px/s do centro
+        self.last_seen = np.empty(0, dtype=np.float64)
+
+        self.next_id = 0
+        self._removed = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def predict(self, now):
+        """Caixas previstas para `now` (extrapolação limitada a 1 s sem observação)."""
+        dt = np.clip(now - self.last_seen, 0.0, 1.0)[:, None]
+        shift = self.velocities * dt
+        return self.boxes + np.concatenate((shift, shift), axis=1)
+
+    def _cost_matrix(self, predicted, boxes):
+        iou = box_iou(predicted, boxes)
+        distance = np.linalg.norm(
+            box_centers(predicted)[:, None, :] - box_centers(boxes)[None, :, :], axis=2
+        )
+        cost = (1.0 - iou) + distance / self.max_distance
+        valid = (distance < self.max_distance) | (iou > 0)
+        return np.where(valid, cost, np.inf)
+
+    @staticmethod
+    def _assign(cost):
+        """Pares (trilha, detecção) de menor custo total, ignorando custos infinitos."""
+        if cost.size == 0:
+            return []
+        if linear_sum_assignment is not None:
+            finite = np.where(np.isfinite(cost), cost, 1e9)
+            rows, cols = linear_sum_assignment(finite)
+            return [(r, c) for r, c in zip(rows.tolist(), cols.tolist()) if np.isfinite(cost[r, c])]
+
+        pairs = []
+        used_rows, used_cols = set(), set()
+        order = np.argsort(cost, axis=None)
+        for flat in order.tolist():
+            r, c = divmod(flat, cost.shape[1])
+            if not np.isfinite(cost[r, c]):
+                break
+            if r in used_rows or c in used_cols:
+                continue
+            pairs.append((r, c))
+            used_rows.add(r)
+            used_cols.add(c)
+        return pairs
+
+    def update(self, boxes, now=None):
+        """Associa as caixas xyxy (N, 4) às trilhas e retorna o array (N,) de IDs."""
+        now = time.monotonic() if now is None else now
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        assigned = np.full(len(boxes), -1, dtype=np.int64)
+
+        if len(self.ids) and len(boxes):
+            for track, det in self._assign(self._cost_matrix(self.predict(now), boxes)):
+                dt = now - self.last_seen[track]
+                if dt > 0:
+                    velocity = (box_centers(boxes[det : det + 1]) - box_centers(self.boxes[track : track + 1]))[0] / dt
+                    self.velocities[track] = (
+                        self.velocity_alpha * velocity
+                        + (1.0 - self.velocity_alpha) * self.velocities[track]
+                    )
+                self.boxes[track] = boxes[det]
+                self.last_seen[track] = now
+                assigned[det] = self.ids[track]
+
+        # Detecções sem trilha abrem novas trilhas
+        new = np.flatnonzero(assigned < 0)
+        if len(new):
+            new_ids = np.arange(self.next_id, self.next_id + len(new), dtype=np.int64)
+            self.next_id += len(new)
+            assigned[new] = new_ids
+            self.ids = np.concatenate((self.ids, new_ids))
+            self.boxes = np.concatenate((self.boxes, boxes[new]))
+            self.velocities = np.concatenate((self.velocities, np.zeros((len(new), 2), np.float32)))
+            self.last_seen = np.concatenate((self.last_seen, np.full(len(new), now)))
+
+        self._prune(now)
+        return assigned
+
+    def _prune(self, now):
+        keep = (now - self.last_seen) <= self.max_age
+        if keep.sum() > self.max_tracks:
+            # Mantém apenas as `max_tracks` trilhas vistas mais recentemente
+            recent = np.argsort(-self.last_seen, kind="stable")[: self.max_tracks]
+            keep = np.zeros(len(self.ids), dtype=bool)
+            keep[recent] = True
+        if keep.all():
+            return
+        self._removed.extend(self.ids[~keep].tolist())
+        self.ids = self.ids[keep]
+        self.boxes = self.boxes[keep]
+        self.velocities = self.velocities[keep]
+        self.last_seen = self.last_seen[keep]
+
+    def pop_removed(self):
+        """IDs de trilhas expiradas/descartadas desde a última chamada."""
+        removed, self._removed = self._removed, []
+        return removed
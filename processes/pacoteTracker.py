@@ -1,47 +1,48 @@
-from ultralytics import YOLO
 import cv2
 import numpy as np
-import time
-from kafka_config.kafka_config import KafkaMessenger
-import torch
-from dotenv import load_dotenv
-import os
-import json
-import datetime
+from processes.baseTracker import BaseTracker, BLUE, GREEN, RED
+from processes.object_tracker import ObjectTracker
+from processes.track_table import TrackTable
 
-load_dotenv()
 
+class PacoteTracker(BaseTracker):
+    NAME = "PacoteTracker"
+    STEP = "Descarregar os produtos"
+    CONFIG_KEY = "spectingPacotes"
+    RESULT_FIELDS = ("statusPassoProduto", "alertPassoProduto")
+    # Pré-filtro de movimento nas ROIs (MOTION_GATE)
+    MOTION_GATE = True
 
-class PacoteTracker:
-    def __init__(self, model_path, procedure_name):
-        # Check if CUDA is available
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"[PacoteTracker] Using device: {self.device}")
+    roi_carga = (375, 176, 205, 319)
+    roi_descarga = (177, 176, 201, 319)
 
-        # Load the YOLO model and move it to the appropriate device
-        self.model = YOLO(model_path).to(self.device)
+    def __init__(self, model_path, step, procedure_name):
+        super().__init__(model_path, step)
 
-        self.messenger_passos = KafkaMessenger(topic="passos")
-        self.prev_centers = []
-        self.pacotes_sem_etiqueta = []
         self.produtos = ["balde", "caixa", "galao", "pacote"]
-        self.isSpecting = True
         self.last_detection_time = None
-        self.start_time = None
-        self.pacotes_contados = 0
-        self.last_count_time = time.time()
-        self.roi_carga = (375, 176, 205, 319)
-        self.roi_descarga = (177, 176, 201, 319)
-        self.y_line_position = 360
         self.statusPassoProduto = False
         self.alertPassoProduto = ""
         self.min_confidence = 0.55
 
         # Configurações para rastreamento de etiquetas
-        self.pacote_states = {}  # {id: {'first_seen': timestamp, 'last_seen': timestamp, 'has_etiqueta': bool,
-        # 'color': tuple, 'last_center': tuple, 'last_etiqueta_time': timestamp,
-        # 'alert_sent': bool, 'in_descarga': bool}}
-        self.next_pacote_id = 0
+        # Estado por pacote em colunas numpy (slot por ID de trilha); tempos ausentes = NaN
+        self.pacote_states = TrackTable(
+            capacity=64,
+            columns={
+                "first_seen": (np.float64, (), np.nan),
+                "last_seen": (np.float64, (), np.nan),
+                "has_etiqueta": (bool, (), False),
+                "last_etiqueta_time": (np.float64, (), np.nan),
+                "last_center": (np.int32, (2,), 0),
+                "color": (np.int32, (3,), 0),
+                "alert_sent": (bool, (), False),
+                "in_descarga": (bool, (), False),
+                "disappeared": (bool, (), False),
+                "disappeared_time": (np.float64, (), np.nan),
+                "last_alert_time": (np.float64, (), np.nan),
+            },
+        )
         self.max_etiqueta_gap = 12.0  # Tempo máximo sem etiqueta (8 segundos)
         self.min_etiqueta_conf = 0  # Confiança mínima para considerar etiqueta válida
         self.max_pacote_age = 10.0  # Tempo máximo sem ver um pacote antes de removê-lo
@@ -50,12 +51,14 @@ class PacoteTracker:
         )
         self.ALERT_INTERVAL = 5
 
-        self.messenger_alertas = KafkaMessenger(topic="alertas")
-
-        with open(os.getenv("JSON_PATH"), "r", encoding="utf-8") as arquivo:
-            self.dados = json.load(arquivo)
+        # IDs estáveis dos pacotes: rastreador multiobjeto com modelo de velocidade constante.
+        # Trilhas não vistas por max_pacote_age expiram; no máximo 50 pacotes rastreados.
+        self.object_tracker = ObjectTracker(
+            max_distance=50.0, max_age=self.max_pacote_age, max_tracks=50
+        )
+        self.pacote_ids = np.empty(0, dtype=np.int64)  # IDs das caixas da última inferência
 
-        self.required_time = self.dados["required_times"][0]["spectingPacotes"] - 1
+        self.required_time = self.required_times["spectingPacotes"] - 1
 
         if not "feirinha" in procedure_name:
             self.max_etiqueta_gap = 32.0
@@ -63,130 +66,72 @@ class PacoteTracker:
         print(
             f"[PacoteTracker] Tempo para emissão de alerta de etiqueta: {self.max_etiqueta_gap}"
         )
-    
-    def skip(self, skipJustification):
-        print("[PacoteTracker] Etapa avançada via comando skip.")
-        
-        self.statusPassoProduto = True 
-        
-        json_to_send = {
-            "Descarregar os produtos": self.statusPassoProduto,
-            "skip": True,
-            "justification": skipJustification
-        }
-        
-        self.messenger_passos.send_message(json_to_send)
-        
-        self.isSpecting = False
-
-    def is_inside_roi(self, box, roi):
-        x1, y1, x2, y2 = box
-        center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
-        roi_x, roi_y, roi_w, roi_h = roi
-        return (roi_x <= center_x <= roi_x + roi_w) and (
-            roi_y <= center_y <= roi_y + roi_h
+
+    @classmethod
+    def from_plan(cls, model_path, step, plan):
+        return cls(model_path, step, plan.name)
+
+    def inference_rois(self):
+        # Inferência apenas no recorte que envolve as duas ROIs (ROI_INFERENCE)
+        return [self.roi_carga, self.roi_descarga]
+
+    def update_pacote_states(self, pacote_ids, has_etiqueta, centers, in_descarga, frame, now):
+        """Atualiza, em bloco, o estado dos pacotes vistos neste frame. Retorna seus slots."""
+        states = self.pacote_states
+
+        slots = states.slots(pacote_ids)
+        is_new = slots < 0
+        if is_new.any():
+            new_slots = states.add(pacote_ids[is_new])
+            slots[is_new] = new_slots
+            states["first_seen"][new_slots] = now
+            states["has_etiqueta"][new_slots] = has_etiqueta[is_new]
+            states["last_etiqueta_time"][new_slots] = np.where(has_etiqueta[is_new], now, np.nan)
+            states["color"][new_slots] = np.where(
+                has_etiqueta[is_new, None], GREEN, RED
+            )
+
+        states["last_seen"][slots] = now
+        states["last_center"][slots] = centers
+        states["in_descarga"][slots] = in_descarga
+        states["disappeared"][slots] = False  # Reset disappeared flag if we see it again
+
+        # Pacotes já conhecidos com etiqueta: verde e alerta resetado
+        seen = slots[~is_new & has_etiqueta]
+        states["last_etiqueta_time"][seen] = now
+        states["has_etiqueta"][seen] = True
+        states["color"][seen] = GREEN
+        states["alert_sent"][seen] = False
+
+        # Só verifica alertas para pacotes já conhecidos, sem etiqueta, na área de descarga
+        check = slots[~is_new & ~has_etiqueta & in_descarga]
+        # Tempo desde a última etiqueta ou, se nunca teve, desde que foi visto
+        since = states["last_etiqueta_time"][check]
+        since = np.where(np.isnan(since), states["first_seen"][check], since)
+        time_without = now - since
+
+        over = time_without > self.max_etiqueta_gap
+        late = check[over]
+        states["has_etiqueta"][late] = False
+        states["color"][late] = RED
+        last_alert = states["last_alert_time"][late]
+        states["last_alert_time"][late] = np.where(np.isnan(last_alert), now, last_alert)
+
+        # Envia alerta se ainda não foi enviado ou se o intervalo de repetição passou
+        due = ~states["alert_sent"][late] | (
+            now - states["last_alert_time"][late] > self.ALERT_INTERVAL
         )
+        for slot, seconds in zip(late[due].tolist(), time_without[over][due].tolist()):
+            self.send_etiqueta_alert(int(states.ids[slot]), seconds, frame, now)
+        states["alert_sent"][late[due]] = True
+        states["last_alert_time"][late[due]] = now
 
-    def get_center(self, box):
-        x1, y1, x2, y2 = box
-        return (x1 + x2) // 2, (y1 + y2) // 2
-
-    def assign_pacote_id(self, box):
-        """Atribui um ID único a cada pacote baseado em sua posição"""
-        center_x, center_y = self.get_center(box)
-
-        # Verifica se corresponde a um pacote existente
-        for pacote_id, state in self.pacote_states.items():
-            last_center = state["last_center"]
-            distance = (
-                (center_x - last_center[0]) ** 2 + (center_y - last_center[1]) ** 2
-            ) ** 0.5
-            if distance < 50:  # Threshold de distância em pixels
-                return pacote_id
-
-        # Se não encontrou correspondência, cria novo ID
-        new_id = self.next_pacote_id
-        self.next_pacote_id += 1
-        return new_id
-
-    def update_pacote_states(self, pacote_id, has_etiqueta, box, in_descarga, frame):
-        """Atualiza o estado de um pacote específico"""
-        now = time.time()
-        center = self.get_center(box)
-
-        if pacote_id not in self.pacote_states:
-            self.pacote_states[pacote_id] = {
-                "first_seen": now,
-                "last_seen": now,
-                "has_etiqueta": has_etiqueta,
-                "last_etiqueta_time": now if has_etiqueta else None,
-                "last_center": center,
-                "color": (0, 255, 0) if has_etiqueta else (0, 0, 255),
-                "alert_sent": False,
-                "in_descarga": in_descarga,
-                "disappeared": False,
-                "disappeared_time": None,
-                "last_alert_time": None,
-            }
-        else:
-            state = self.pacote_states[pacote_id]
-            state["last_seen"] = now
-            state["last_center"] = center
-            state["in_descarga"] = in_descarga
-            state["disappeared"] = False  # Reset disappeared flag if we see it again
-
-            if has_etiqueta:
-                state["last_etiqueta_time"] = now
-                state["has_etiqueta"] = True
-                state["color"] = (0, 255, 0)  # Verde
-                state["alert_sent"] = (
-                    False  # Resetar alerta quando etiqueta é detectada
-                )
-            else:
-                # Só verifica alertas para pacotes na área de descarga
-                if in_descarga:
-                    # Verifica se ultrapassou o tempo máximo sem etiqueta
-                    time_without_etiqueta = 0
-
-                    if state["last_etiqueta_time"]:
-                        # Pacote que já teve etiqueta mas perdeu
-                        time_without_etiqueta = now - state["last_etiqueta_time"]
-                    else:
-                        # Pacote que nunca teve etiqueta
-                        time_without_etiqueta = now - state["first_seen"]
-
-                    if time_without_etiqueta > self.max_etiqueta_gap:
-                        state["has_etiqueta"] = False
-                        state["color"] = (0, 0, 255)  # Vermelho
-
-                        if state["last_alert_time"] is None:
-                            state["last_alert_time"] = now
-
-                        # Envia alerta se ainda não foi enviado
-                        if (
-                            not state["alert_sent"]
-                            or (now - state["last_alert_time"]) > self.ALERT_INTERVAL
-                        ):
-                            self.send_etiqueta_alert(
-                                pacote_id, time_without_etiqueta, frame
-                            )
-                            state["alert_sent"] = True
-                            state["last_alert_time"] = now
-
-        if len(self.pacote_states) > 50:  # Limite máximo de pacotes rastreados
-            # Remove os mais antigos primeiro
-            oldest_ids = sorted(
-                self.pacote_states.keys(),
-                key=lambda x: self.pacote_states[x]["last_seen"],
-            )[:10]
-            for old_id in oldest_ids:
-                del self.pacote_states[old_id]
-
-    def send_etiqueta_alert(self, pacote_id, time_without, frame):
+        return slots
+
+    def send_etiqueta_alert(self, pacote_id, time_without, frame, now):
         """Envia alerta sobre pacote sem etiqueta com throttling"""
         if not hasattr(self, "_last_alert_time"):
-            self._last_alert_time = 0
-        now = time.time()
+            self._last_alert_time = -np.inf
         if (
             now - self._last_alert_time < 2.0
         ):  # Não envia mais de 1 alerta a cada 2 segundos
@@ -201,265 +146,130 @@ class PacoteTracker:
         print(
             f"[ALERTA] Pacote {pacote_id} sem etiqueta por {time_without:.1f} segundos"
         )
+        self.save_frame(frame)
+
+    def check_etiqueta_inside_pacote(self, produtos, etiquetas):
+        """Para cada pacote, indica se há etiquetas válidas dentro dele (vetorizado)"""
+        etiquetas = etiquetas[etiquetas.min_conf(self.min_etiqueta_conf)]
+        return produtos.contains(etiquetas).any(axis=1)
+
+    def postprocess(self, detections):
+        produtos = detections.filter(self.produtos)
+        etiquetas = detections.filter("etiqueta")
+        # Pertinência aos ROIs e etiquetas contidas, calculadas para todos os pacotes de uma vez
+        in_descarga = produtos.center_in_roi(self.roi_descarga) & produtos.min_conf(
+            self.min_confidence
+        )
+        return {
+            "produtos": produtos,
+            "etiquetas": etiquetas,
+            "in_carga": produtos.center_in_roi(self.roi_carga),
+            "in_descarga": in_descarga,
+            "has_etiqueta": self.check_etiqueta_inside_pacote(produtos, etiquetas),
+        }
 
-        if os.getenv("SAVE_RESULTS"):
-            filename = os.path.join(os.getenv("SAVE_PATH"), f"{datetime.now()}.jpg")
-            print(f"[Produto Tracker] Saving file: {filename}")
-            cv2.imwrite(filename, frame)
-
-    def check_etiqueta_inside_pacote(self, pacote_box, etiqueta_boxes, etiqueta_confs):
-        """Verifica se há etiquetas válidas dentro do pacote"""
-        x1_p, y1_p, x2_p, y2_p = pacote_box
-        for (x1_e, y1_e, x2_e, y2_e), conf in zip(etiqueta_boxes, etiqueta_confs):
-            if conf < self.min_etiqueta_conf:
-                continue
-            if x1_e >= x1_p and y1_e >= y1_p and x2_e <= x2_p and y2_e <= y2_p:
-                return True
-        return False
-
-    def check_roi_detections(self, produto_boxes, produto_confs, roi, min_confidence=0):
-        for i, pacote_box in enumerate(produto_boxes):
-            if (
-                self.is_inside_roi(pacote_box, roi)
-                and produto_confs[i] >= min_confidence
-            ):
-                return True
-        return False
-
-    def process_video(self, frame):
-        try:
-            if not self.last_detection_time:
-                self.last_detection_time = time.time()
-                self.start_time = time.time()
-            frame = cv2.resize(frame, (640, 640))
-
-            if (
-                time.time() - self.start_time
-                > self.dados["timeouts"][0]["spectingPacotes"] - 1
-            ):
-                self.statusPassoProduto = False
-                json_to_send = {"Descarregar os produtos": self.statusPassoProduto}
-                self.messenger_passos.send_message(json_to_send)
-                self.isSpecting = False
-                self.alertPassoProduto = (
-                    "Timeout excedido para descarregamento de produtos."
-                )
-                print(
-                    "[Produto Tracker] Timeout excedido para descarregamento de produtos."
-                )
-                json_alert = {
-                    "alerta": True,
-                    "type": "info",
-                    "message": "Tempo limite excedido para o descarregamento de produtos",
-                }
-                self.messenger_alertas.send_message(json_alert)
-
-                if os.getenv("SAVE_RESULTS"):
-                    filename = os.path.join(
-                        os.getenv("SAVE_PATH"), f"{datetime.now()}.jpg"
-                    )
-                    print(f"[Produto Tracker] Saving file: {filename}")
-                    cv2.imwrite(filename, frame)
-
-            # Move the frame to the same device as the model
-            # if self.device == 'cuda':
-            #     frame_tensor = torch.from_numpy(frame).to(self.device).float() / 255.0
-            #     frame_tensor = frame_tensor.permute(2, 0, 1).unsqueeze(0)
-            # else:
-            frame_tensor = frame
-
-            # Perform inference
-            results = self.model(frame_tensor, verbose=False)
-
-            produto_boxes = []
-            produto_confs = []
-            produto_labels = []
-            etiqueta_boxes = []
-            etiqueta_confs = []
-
-            for result in results:
-                for box in result.boxes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    conf = round(box.conf[0].item(), 2)
-                    cls = int(box.cls[0].item())
-                    label = self.model.names[cls]
-
-                    if label in self.produtos:
-                        produto_boxes.append((x1, y1, x2, y2))
-                        produto_confs.append(conf)
-                        produto_labels.append(label)
-                    elif label == "etiqueta":
-                        etiqueta_boxes.append((x1, y1, x2, y2))
-                        etiqueta_confs.append(conf)
-
-            # Verifica detecções em ambos os ROIs
-            roi_carga_detections = self.check_roi_detections(
-                produto_boxes, produto_confs, self.roi_carga
+    def decide(self, result, frame, now):
+        if not self.last_detection_time:
+            self.last_detection_time = now
+
+        if self.timed_out(now):
+            print("[Produto Tracker] Timeout excedido para descarregamento de produtos.")
+            self.finish(
+                False,
+                alert="Timeout excedido para descarregamento de produtos.",
+                alert_message="Tempo limite excedido para o descarregamento de produtos",
+                frame=frame,
             )
-            roi_descarga_detections = self.check_roi_detections(
-                produto_boxes, produto_confs, self.roi_descarga, self.min_confidence
+            return
+
+        produtos = result["produtos"]
+        in_carga_mask = result["in_carga"]
+        in_descarga_mask = result["in_descarga"]
+
+        # Presença de produtos na ROI de carga
+        if in_carga_mask.any():
+            self.last_detection_time = now
+        elif now - self.last_detection_time > self.required_time:
+            self.finish(True)
+            print(
+                f"[Produto Tracker] Nenhuma detecção nos ROIs por {self.required_time} segundos. Parando a inspeção."
             )
 
-            if roi_carga_detections:
-                self.last_detection_time = time.time()
+        # Associa os pacotes nos ROIs às trilhas e descarta o estado das trilhas expiradas.
+        # Só com uma inferência nova: detecções reaproveitadas pelo scheduler não são
+        # observações e puxariam a velocidade das trilhas para zero
+        tracked = np.flatnonzero(in_carga_mask | in_descarga_mask)
+        if self.scheduler.fresh or len(self.pacote_ids) != len(tracked):
+            self.pacote_ids = self.object_tracker.update(produtos.xyxy[tracked], now)
+            self.pacote_states.remove(self.object_tracker.pop_removed())
+        pacote_ids = self.pacote_ids
+
+        # Lógica de desaparecimento de pacote: 1 segundo sem ser visto
+        states = self.pacote_states
+        vanished = (
+            states.active
+            & ~states["disappeared"]
+            & (now - states["last_seen"] > 1.0)
+        )
+        states["disappeared"][vanished] = True
+        states["disappeared_time"][vanished] = now
+
+        # Atualiza o estado de todos os pacotes detectados nos ROIs de uma vez
+        result["tracked"] = tracked
+        result["slots"] = self.update_pacote_states(
+            pacote_ids,
+            result["has_etiqueta"][tracked],
+            produtos.centers()[tracked],
+            in_descarga_mask[tracked],
+            frame,
+            now,
+        )
+        result["now"] = now
+
+    def draw(self, frame, result):
+        produtos = result["produtos"]
+        etiquetas = result["etiquetas"]
+        states = self.pacote_states
+        now = result.get("now")
+
+        # Desenha cada pacote detectado em algum ROI (não rastreados no frame do timeout)
+        tracked = result.get("tracked", np.empty(0, dtype=np.intp))
+        slots = result.get("slots", np.empty(0, dtype=np.intp))
+        for idx, slot in zip(tracked.tolist(), slots.tolist()):
+            x1, y1, x2, y2 = produtos.xyxy[idx].astype(int).tolist()
+            conf = round(float(produtos.conf[idx]), 2)
+            label = produtos.names[int(produtos.cls[idx])]
+
+            if result["in_descarga"][idx]:
+                if not states["has_etiqueta"][slot]:
+                    # Tempo desde a última etiqueta ou, se nunca teve, desde que foi visto
+                    since = states["last_etiqueta_time"][slot]
+                    if np.isnan(since):
+                        since = states["first_seen"][slot]
+                    status = f"SEM ETIQUETA ({now - since:.1f}s)"
+                else:
+                    status = "COM ETIQUETA"
+                color = tuple(states["color"][slot].tolist())
+                text = f"{label} {status} {conf}"
+            elif result["in_carga"][idx]:
+                color = BLUE
+                text = f"{label} {conf}"
             else:
-                if time.time() - self.last_detection_time > self.required_time:
-                    self.statusPassoProduto = True
-                    json_to_send = {"Descarregar os produtos": self.statusPassoProduto}
-                    self.messenger_passos.send_message(json_to_send)
-                    self.isSpecting = False
-                    print(
-                        f"[Produto Tracker] Nenhuma detecção nos ROIs por {self.required_time} segundos. Parando a inspeção."
-                    )
-
-            now = time.time()
-            to_remove = []
-
-            # Lógica de desaparecimento de pacote
-            for pid, state in self.pacote_states.items():
-                # Verifica se o pacote desapareceu
-                # if state['in_descarga']:
-                if (
-                    now - state["last_seen"] > 1.0 and not state["disappeared"]
-                ):  # 1 segundo sem ser visto
-                    state["disappeared"] = True
-                    state["disappeared_time"] = now
-
-                    # Verifica se desapareceu sem etiqueta após tempo suficiente
-                    if not state["has_etiqueta"]:
-                        lifetime = now - state["first_seen"]
-                        # if lifetime >= self.max_pacote_lifetime_without_etiqueta:
-                        #     self.send_disappeared_alert(pid, lifetime)
-                # Verifica se deve remover o pacote (tempo muito longo sem ser visto)
-                if now - state["last_seen"] > self.max_pacote_age:
-                    to_remove.append(pid)
-            for pid in to_remove:
-                del self.pacote_states[pid]
-
-            # Processa cada pacote detectado
-            for idx, box in enumerate(produto_boxes):
-                x1, y1, x2, y2 = box
-                conf = produto_confs[idx]
-                label = produto_labels[idx]
-
-                in_carga = self.is_inside_roi(box, self.roi_carga)
-                in_descarga = (
-                    self.is_inside_roi(box, self.roi_descarga)
-                    and conf >= self.min_confidence
-                )
-
-                if in_carga or in_descarga:
-                    pacote_id = self.assign_pacote_id(box)
-                    has_etiqueta = self.check_etiqueta_inside_pacote(
-                        box, etiqueta_boxes, etiqueta_confs
-                    )
-                    self.update_pacote_states(
-                        pacote_id, has_etiqueta, box, in_descarga, frame
-                    )
-
-                    # Obtém o estado atualizado
-                    state = self.pacote_states.get(
-                        pacote_id, {"color": (0, 255, 0), "has_etiqueta": False}
-                    )
-                    color = state["color"]
-
-                    if in_descarga:
-                        # Calcula tempo sem etiqueta
-                        time_without = 0
-                        if not state["has_etiqueta"]:
-                            if state["last_etiqueta_time"]:
-                                # Já teve etiqueta antes
-                                time_without = now - state["last_etiqueta_time"]
-                            else:
-                                # Nunca teve etiqueta
-                                time_without = now - state["first_seen"]
-
-                            status = f"SEM ETIQUETA ({time_without:.1f}s)"
-                        else:
-                            status = "COM ETIQUETA"
-
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                        cv2.putText(
-                            frame,
-                            f"{label} {status} {conf}",
-                            (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.5,
-                            color,
-                            2,
-                        )
-                    elif in_carga:
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
-                        cv2.putText(
-                            frame,
-                            f"{label} {conf}",
-                            (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.5,
-                            (255, 0, 0),
-                            2,
-                        )
-
-            # Desenha etiquetas
-            for idx, etiqueta_box in enumerate(etiqueta_boxes):
-                x1, y1, x2, y2 = etiqueta_box
-                conf = etiqueta_confs[idx]
-                in_descarga = self.is_inside_roi(etiqueta_box, self.roi_descarga)
-                if in_descarga:
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
-                    cv2.putText(
-                        frame,
-                        f"Etiqueta {conf}",
-                        (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.5,
-                        (0, 255, 255),
-                        2,
-                    )
-
-            # Desenha os ROIs
-            # ROI de Carga (vermelho)
-            roi_x, roi_y, roi_w, roi_h = self.roi_carga
-            cv2.rectangle(
-                frame, (roi_x, roi_y), (roi_x + roi_w, roi_y + roi_h), (0, 0, 255), 2
-            )
-            cv2.putText(
-                frame,
-                "ROI Carga",
-                (roi_x, roi_y - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 0, 255),
-                2,
-            )
+                continue
 
-            # ROI de Descarga (verde)
-            roi_x, roi_y, roi_w, roi_h = self.roi_descarga
-            cv2.rectangle(
-                frame, (roi_x, roi_y), (roi_x + roi_w, roi_y + roi_h), (0, 255, 0), 2
-            )
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
             cv2.putText(
-                frame,
-                "ROI Descarga",
-                (roi_x, roi_y - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 255, 0),
-                2,
+                frame, text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2
             )
 
-            print(
-                f"[DEBUG] Pacotes ativos: {len(self.pacote_states)}, Memória GPU: {torch.cuda.memory_allocated() / 1e6:.2f}MB"
-                if self.device == "cuda"
-                else ""
-            )
-
-            if self.device == "cuda":
-                del frame_tensor
-                torch.cuda.empty_cache()
-
-            return frame
-        except Exception as e:
-            print(f"[PacoteTracker] Error processing frame: {e}")
-            return frame
+        # Desenha etiquetas
+        self.draw_detections(
+            frame,
+            etiquetas[etiquetas.center_in_roi(self.roi_descarga)],
+            color=(0, 255, 255),
+            text="Etiqueta {conf:.2f}",
+        )
 
+        # Desenha os ROIs: carga (vermelho) e descarga (verde)
+        self.draw_roi(frame, self.roi_carga, "ROI Carga", RED)
+        self.draw_roi(frame, self.roi_descarga, "ROI Descarga", GREEN)
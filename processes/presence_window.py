@@ -0,0 +1,109 @@
+import time
+from collections import deque
+
+
+class ContinuousPresence:
+    """
+    Presença contínua: satisfeita quando as detecções dos últimos `window`
+    segundos cobrem pelo menos `duration` segundos (primeira à última),
+    tolerando falhas de detecção dentro da janela. Guarda só os instantes
+    com presença num deque; cada atualização é O(1) amortizado.
+    """
+
+    def __init__(self, duration, window=None):
+        self.duration = duration
+        self.window = window if window is not None else duration + 1
+        self.times = deque()
+
+    def update(self, present, now=None):
+        """Registra a amostra e retorna se a presença contínua foi atingida."""
+        now = time.monotonic() if now is None else now
+        if present:
+            self.times.append(now)
+        while self.times and now - self.times[0] > self.window:
+            self.times.popleft()
+        return self.satisfied
+
+    @property
+    def satisfied(self):
+        return bool(self.times) and self.times[-1] - self.times[0] >= self.duration
+
+    @property
+    def elapsed(self):
+        return self.times[-1] - self.times[0] if self.times else 0.0
+
+    def reset(self):
+        self.times.clear()
+
+
+class PresenceRatio:
+    """
+    Proporção de presença: satisfeita quando, com a janela de `window`
+    segundos já preenchida, a fração de amostras com presença é pelo menos
+    `min_ratio`. Mantém as amostras num deque e a contagem de presentes em
+    um contador (O(1) amortizado por atualização).
+    """
+
+    def __init__(self, window, min_ratio):
+        self.window = window
+        self.min_ratio = min_ratio
+        self.samples = deque()  # (instante, presente)
+        self.present = 0
+        self.started = None
+
+    def update(self, present, now=None):
+        """Registra a amostra e retorna se a proporção mínima foi atingida."""
+        now = time.monotonic() if now is None else now
+        if self.started is None:
+            self.started = now
+        present = bool(present)
+        self.samples.append((now, present))
+        self.present += present
+        while now - self.samples[0][0] > self.window:
+            _, old = self.samples.popleft()
+            self.present -= old
+        return self.satisfied(now)
+
+    @property
+    def ratio(self):
+        return self.present / len(self.samples) if self.samples else 0.0
+
+    def satisfied(self, now):
+        return now - self.started >= self.window and self.ratio >= self.min_ratio
+
+    def reset(self):
+        self.samples.clear()
+        self.present = 0
+        self.started = None
+
+
+class Hysteresis:
+    """
+    Estado presente/ausente com histerese: só passa a presente depois de
+    `on_time` segundos seguidos com presença e volta a ausente depois de
+    `off_time` segundos seguidos sem presença. `update` retorna True no
+    frame em que o estado muda.
+    """
+
+    def __init__(self, on_time, off_time=None, state=False):
+        self.on_time = on_time
+        self.off_time = on_time if off_time is None else off_time
+        self.state = state
+        self.since = None  # Início da condição contrária ao estado atual
+
+    def update(self, present, now=None):
+        now = time.monotonic() if now is None else now
+        if bool(present) == self.state:
+            self.since = None
+            return False
+        if self.since is None:
+            self.since = now
+        if now - self.since >= (self.on_time if present else self.off_time):
+            self.state = bool(present)
+            self.since = None
+            return True
+        return False
+
+    def reset(self, state=False):
+        self.state = state
+        self.since = None
@@ -0,0 +1,60 @@
+import math
+import numpy as np
+import os
+from dotenv import load_dotenv
+from processes.detections import Detections
+
+load_dotenv()
+
+
+class RoiInference:
+    """
+    Inferência restrita à união das ROIs de um tracker.
+    Recorta o frame ao retângulo que envolve as ROIs (mais uma margem),
+    roda o modelo só nesse recorte e devolve as detecções já em coordenadas
+    do frame. Por padrão o imgsz acompanha o recorte (múltiplo de 32, sem
+    reescala), então o custo cai na proporção da área; ROI_INFERENCE_IMGSZ
+    força um imgsz menor (letterbox).
+
+    Com ROI_INFERENCE desabilitado, infere no frame inteiro como antes.
+    """
+
+    STRIDE = 32
+
+    def __init__(self, model, rois, margin=None, imgsz=None, enabled=None):
+        self.model = model
+        self.rois = [tuple(roi) for roi in rois]  # [(x, y, w, h)]
+        self.margin = margin if margin is not None else int(os.getenv("ROI_INFERENCE_MARGIN", "32"))
+        self.imgsz = imgsz or int(os.getenv("ROI_INFERENCE_IMGSZ", "0")) or None
+        if enabled is None:
+            enabled = os.getenv("ROI_INFERENCE", "True").lower() not in ("0", "false", "no")
+        self.enabled = enabled and bool(self.rois)
+
+    def crop_box(self, frame_shape):
+        """Retângulo (x1, y1, x2, y2) da união das ROIs com margem, limitado ao frame."""
+        height, width = frame_shape[:2]
+        x1 = min(x for x, _, _, _ in self.rois) - self.margin
+        y1 = min(y for _, y, _, _ in self.rois) - self.margin
+        x2 = max(x + w for x, _, w, _ in self.rois) + self.margin
+        y2 = max(y + h for _, y, _, h in self.rois) + self.margin
+        return max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+
+    def _imgsz_for(self, crop):
+        if self.imgsz:
+            return self.imgsz
+        height, width = crop.shape[:2]
+        return (
+            math.ceil(height / self.STRIDE) * self.STRIDE,
+            math.ceil(width / self.STRIDE) * self.STRIDE,
+        )
+
+    def __call__(self, frame, **kwargs):
+        """Executa o modelo e retorna `Detections` em coordenadas do frame original."""
+        kwargs.setdefault("verbose", False)
+        if not self.enabled:
+            return Detections.from_results(self.model(frame, **kwargs), self.model.names)
+
+        x1, y1, x2, y2 = self.crop_box(frame.shape)
+        crop = np.ascontiguousarray(frame[y1:y2, x1:x2])
+        results = self.model(crop, imgsz=self._imgsz_for(crop), **kwargs)
+        return Detections.from_results(results, self.model.names).offset(x1, y1)
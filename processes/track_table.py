@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class TrackTable:
+    """
+    Tabela de trilhas em struct-of-arrays: uma coluna numpy pré-alocada por
+    campo e reaproveitamento de slots por lista livre. As varreduras
+    (envelhecimento, desaparecimento, remoção) são operações sobre colunas
+    inteiras filtradas pela máscara `active`, sem dicionários por trilha.
+
+    `columns` mapeia nome -> (dtype, forma extra, valor inicial), ex.:
+    {"last_seen": (np.float64, (), np.nan), "color": (np.uint8, (3,), 0)}.
+    """
+
+    def __init__(self, capacity, columns):
+        self.capacity = capacity
+        self.columns = dict(columns)
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self._data = {
+            name: np.full((capacity,) + tuple(shape), fill, dtype=dtype)
+            for name, (dtype, shape, fill) in self.columns.items()
+        }
+        self._free = list(range(capacity - 1, -1, -1))  # pop() devolve o menor slot
+        self._slots = {}  # {id: slot}
+
+    def __getitem__(self, name):
+        return self._data[name]
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, track_id):
+        return track_id in self._slots
+
+    def slots(self, track_ids):
+        """Slots (array) dos IDs informados; -1 para IDs ausentes."""
+        return np.array([self._slots.get(i, -1) for i in track_ids], dtype=np.int64)
+
+    def add(self, track_ids):
+        """
+        Aloca slots (com os valores iniciais) para os IDs novos e retorna seus slots;
+        IDs já presentes mantêm o slot atual.
+        """
+        if len(track_ids) > self.capacity:
+            raise ValueError(f"{len(track_ids)} IDs excedem a capacidade da tabela ({self.capacity}).")
+        slots = np.empty(len(track_ids), dtype=np.int64)
+        for k, track_id in enumerate(track_ids):
+            if track_id in self._slots:
+                slots[k] = self._slots[track_id]
+                continue
+            if not self._free:
+                # Tabela cheia: libera a trilha vista há mais tempo (nunca uma alocada nesta chamada)
+                self.remove([self.ids[self.oldest(exclude=slots[:k])]])
+            slot = self._free.pop()
+            self._slots[track_id] = slot
+            self.ids[slot] = track_id
+            self.active[slot] = True
+            for name, (_, _, fill) in self.columns.items():
+                self._data[name][slot] = fill
+            slots[k] = slot
+        return slots
+
+    def remove(self, track_ids):
+        for track_id in track_ids:
+            slot = self._slots.pop(track_id, None)
+            if slot is None:
+                continue
+            self.ids[slot] = -1
+            self.active[slot] = False
+            self._free.append(slot)
+
+    def oldest(self, column="last_seen", exclude=None):
+        """Slot ativo com o menor valor em `column`, ignorando os slots em `exclude`."""
+        candidates = self.active.copy()
+        if exclude is not None:
+            candidates[exclude] = False
+        values = np.where(candidates, self._data[column], np.inf)
+        return int(np.argmin(values))
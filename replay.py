@@ -0,0 +1,248 @@
+"""
+Replay offline de um procedimento a partir de gravações das câmeras.
+
+Executa a mesma sequência de passos do InspectProcedure sobre vídeos gravados,
+tão rápido quanto o hardware permitir, e grava veredictos, alertas e tempos de
+cada passo em um arquivo JSON. Não grava no banco nem publica no Kafka: as
+mensagens dos trackers são capturadas no arquivo de resultados.
+
+O diretório deve ter um vídeo por câmera, nomeado pela variável de ambiente
+correspondente, com ou sem o prefixo VIDEO_PATH_ (ex.: VIDEO_PATH_START.mp4 ou
+start.mp4, pallet.mkv, default.mp4). Câmeras sem gravação usam a "default".
+As gravações de uma sessão devem começar no mesmo instante: ao trocar de
+câmera o replay continua do mesmo tempo de vídeo.
+
+Uso:
+    python replay.py <diretorio_gravacoes> <procedimento> [-o resultados.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from api import InspectProcedure
+from kafka_config.kafka_config import KafkaMessenger
+from procedure_config.procedure_config import VIDEO_PATH_VARS
+from video_config.stream_hub import StreamHub
+from video_config.stamped_frame import frame_time
+from video_config.video_capture import VideoCapture
+
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".ts"}
+CAMERA_VARS = list(VIDEO_PATH_VARS.values()) + ["VIDEO_PATH_DEFAULT"]
+
+
+def find_recordings(directory):
+    """Mapeia cada variável VIDEO_PATH_* para a gravação correspondente no diretório (ou None)."""
+    found = {}
+    for filename in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(filename)
+        if extension.lower() not in VIDEO_EXTENSIONS:
+            continue
+        name = stem.upper()
+        if not name.startswith("VIDEO_PATH_"):
+            name = f"VIDEO_PATH_{name}"
+        if name in CAMERA_VARS:
+            found[name] = os.path.join(directory, filename)
+
+    default = found.get("VIDEO_PATH_DEFAULT")
+    return {name: found.get(name, default) for name in CAMERA_VARS}
+
+
+class ReplayCapture:
+    """
+    Substitui o CameraManager no replay: lê as gravações com cv2, sem pacing.
+    O tempo de vídeo é contínuo entre câmeras: a nova gravação é posicionada
+    no instante em que a anterior parou.
+    """
+
+    def __init__(self, frame_callback, on_end=None):
+        self.frame_callback = frame_callback
+        self.on_end = on_end  # Chamado com o motivo quando as gravações acabam
+        self.running = False
+        self.path = None
+        self.reader = None
+        self.position = 0.0  # Tempo de vídeo (s) do último frame entregue
+        self.frames = 0
+
+    def switch(self, path):
+        if path == self.path:
+            return
+        if self.reader is not None:
+            self.reader.stop_capture()
+            self.reader = None
+        self.path = path
+        if path is None:
+            return
+        self.reader = VideoCapture(path)
+        self.reader.seek(self.position)
+        print(f"[ReplayCapture] Gravação ativa: {path} ({self.position:.1f}s)")
+
+    def start_capture(self):
+        """Loop (bloqueante): entrega os frames da gravação ativa até o fim ou até stop_capture()."""
+        self.running = True
+        while self.running:
+            if self.reader is None:
+                self._end("sem gravação para a câmera do passo atual")
+                break
+            frame = self.reader.read()
+            if frame is None:
+                self._end(f"fim da gravação {os.path.basename(self.path)}")
+                break
+            self.position = frame_time(frame)
+            self.frames += 1
+            self.frame_callback(frame)
+
+        if self.reader is not None:
+            self.reader.stop_capture()
+
+    def _end(self, reason):
+        self.running = False
+        if self.on_end:
+            self.on_end(reason)
+
+    def stop_capture(self):
+        self.running = False
+
+
+class ReplaySession(InspectProcedure):
+    """
+    InspectProcedure alimentado por gravações: mesmos trackers e mesma ordem de
+    passos, com resultados (e mensagens dos trackers) gravados em arquivo.
+    """
+
+    def __init__(self, recordings_dir):
+        self.recordings_dir = recordings_dir
+        super().__init__(find_recordings(recordings_dir))
+        self.video_capture = ReplayCapture(self.frame_process, on_end=self.end_of_recording)
+        # Hub próprio, sem assinantes: o replay não aparece no /video_feed das docas
+        self.stream_hub = StreamHub()
+
+        self.steps = {}  # {tracker: veredicto, tempos e inferências do passo}
+        self.messages = []
+        self.record = None
+
+    @staticmethod
+    def preload_resources(video_paths):
+        # Só os modelos: as gravações são abertas sob demanda
+        InspectProcedure.preload_models()
+
+    def create_tracker(self, step):
+        tracker = super().create_tracker(step)
+        self.steps[step.name] = {
+            "tracker": step.name,
+            "camera": step.video_path_var,
+            "status": None,
+            "video_start": None,
+            "video_end": None,
+            "frames": 0,
+            "processing_seconds": 0.0,
+        }
+        return tracker
+
+    def frame_process(self, frame):
+        started = time.perf_counter()
+        processed_frame = super().frame_process(frame)
+        # None: frame descartado (troca de passo) ou sessão encerrada
+        if self.current_tracker is not None and processed_frame is not None:
+            step = self.steps[type(self.current_tracker).__name__]
+            now = round(frame_time(frame), 3)
+            if step["video_start"] is None:
+                step["video_start"] = now
+            step["video_end"] = now
+            step["frames"] += 1
+            step["processing_seconds"] += time.perf_counter() - started
+        return processed_frame
+
+    def collect_results(self, tracker):
+        super().collect_results(tracker)
+        name = type(tracker).__name__
+        step = self.steps[name]
+        step["results"] = self.tracker_results[name]
+        step["status"] = self.tracker_results[name][tracker.RESULT_FIELDS[0]]
+        step["inferences"] = tracker.scheduler.stats()
+        step["processing_seconds"] = round(step["processing_seconds"], 3)
+
+    def end_of_recording(self, reason):
+        """As gravações acabaram antes do último passo: encerra com os passos concluídos até aqui."""
+        if self.finished:
+            return
+        logging.warning(f"[Replay] Procedimento interrompido: {reason}.")
+        self.obs = f"Replay interrompido: {reason}."
+        self.timestamp_fim = datetime.now()
+        if self.current_tracker is not None:
+            self.collect_results(self.current_tracker)
+        self.save_on_db()
+        self.finished = True
+
+    def save_on_db(self):
+        # Replay não grava no banco: o registro vai para o arquivo de resultados
+        self.record = self.procedure_record()
+
+    def capture_message(self, topic, json_data):
+        self.messages.append(
+            {"video_time": round(self.video_capture.position, 3), "topic": topic, "message": json_data}
+        )
+
+    def run(self, procedure_name):
+        """Executa o procedimento sobre as gravações e retorna os resultados."""
+        plan = self.procedures.get(procedure_name)
+        if plan is None:
+            raise ValueError(f"Procedimento '{procedure_name}' não encontrado no JSON.")
+
+        # A primeira câmera é a do primeiro passo, não necessariamente a de START
+        self.video_path = self.video_paths[plan.steps[0].video_path_var]
+
+        KafkaMessenger.sink = self.capture_message
+        started = time.perf_counter()
+        try:
+            self.process_video_on_procedure(procedure_name)
+        finally:
+            KafkaMessenger.sink = None
+        wall_seconds = time.perf_counter() - started
+
+        # Passos sem efeito neste procedimento não chegam a criar tracker: gravados como aprovados
+        for step in plan.steps:
+            if step not in self.tracker_order:
+                results = self.tracker_results.get(step.name, {})
+                status = results.get(step.tracker_class.RESULT_FIELDS[0])
+                self.steps[step.name] = {"tracker": step.name, "status": status, "noop": True, "results": results}
+
+        video_seconds = self.video_capture.position
+        return {
+            "procedure": procedure_name,
+            "recordings": {k: v for k, v in self.video_paths.items() if v},
+            "completed": self.tracker_index >= len(self.tracker_order),
+            "record": self.record,
+            "steps": [self.steps[name] for name in plan.step_names if name in self.steps],
+            "messages": self.messages,
+            "frames": self.video_capture.frames,
+            "video_seconds": round(video_seconds, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "speedup": round(video_seconds / wall_seconds, 2) if wall_seconds > 0 else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay offline de um procedimento sobre gravações.")
+    parser.add_argument("recordings", help="Diretório com um vídeo por câmera")
+    parser.add_argument("procedure", help="Nome do procedimento (procedimentos.json)")
+    parser.add_argument(
+        "-o", "--output", help="Arquivo de resultados (padrão: <recordings>/replay_<procedimento>.json)"
+    )
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(args.recordings, f"replay_{args.procedure}.json")
+    results = ReplaySession(args.recordings).run(args.procedure)
+    with open(output, "w", encoding="utf-8") as arquivo:
+        json.dump(results, arquivo, indent=2, ensure_ascii=False, default=str)
+
+    logging.info(
+        f"[Replay] {args.procedure}: {results['frames']} frames, {results['video_seconds']}s de vídeo "
+        f"em {results['wall_seconds']}s ({results['speedup']}x). Resultados em {output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
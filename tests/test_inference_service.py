@@ -0,0 +1,50 @@
+from concurrent.futures import TimeoutError
+import threading
+import pytest
+from model_config.inference_service import InferenceService
+
+
+class EchoModel:
+    names = {0: "pacote"}
+
+    def __init__(self, drop=0):
+        self.drop = drop  # Quantos resultados "perder" por lote
+
+    def __call__(self, frames, **kwargs):
+        return list(frames)[: len(frames) - self.drop]
+
+
+def test_returns_model_result():
+    service = InferenceService(EchoModel(), max_wait=0)
+    assert service("frame") == ["frame"]
+
+
+def test_short_model_output_fails_request_and_worker_survives():
+    model = EchoModel(drop=1)
+    service = InferenceService(model, max_wait=0)
+    with pytest.raises(RuntimeError):
+        service("frame")
+    model.drop = 0
+    assert service("frame") == ["frame"]
+
+
+def test_error_outside_forward_fails_request_and_worker_survives():
+    service = InferenceService(EchoModel(), max_wait=0)
+    with pytest.raises(TypeError):
+        service("frame", classes=[0])  # kwargs não hasheáveis quebram o agrupamento
+    assert service("frame") == ["frame"]
+
+
+def test_stuck_worker_times_out():
+    release = threading.Event()
+
+    class StuckModel(EchoModel):
+        def __call__(self, frames, **kwargs):
+            release.wait()
+            return list(frames)
+
+    service = InferenceService(StuckModel(), max_wait=0)
+    service.timeout = 0.1
+    with pytest.raises(TimeoutError):
+        service("frame")
+    release.set()
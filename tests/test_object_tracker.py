@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+import processes.object_tracker as object_tracker
+from processes.object_tracker import ObjectTracker
+
+
+def box(x, y, size=40):
+    return [x, y, x + size, y + size]
+
+
+@pytest.fixture(params=["hungarian", "greedy"])
+def assignment(request, monkeypatch):
+    if request.param == "greedy":
+        monkeypatch.setattr(object_tracker, "linear_sum_assignment", None)
+    elif object_tracker.linear_sum_assignment is None:
+        pytest.skip("scipy não instalado")
+    return request.param
+
+
+def test_new_detections_get_new_ids(assignment):
+    tracker = ObjectTracker()
+    ids = tracker.update([box(0, 0), box(200, 200)], now=0.0)
+    assert ids.tolist() == [0, 1]
+    assert len(tracker) == 2
+
+
+def test_moving_object_keeps_its_id(assignment):
+    tracker = ObjectTracker(max_distance=50.0)
+    first = tracker.update([box(100, 100)], now=0.0)[0]
+    for step in range(1, 10):
+        ids = tracker.update([box(100 + 10 * step, 100)], now=step * 0.1)
+        assert ids.tolist() == [first]
+
+
+def test_two_objects_are_not_swapped(assignment):
+    tracker = ObjectTracker(max_distance=80.0)
+    a, b = tracker.update([box(100, 100), box(300, 100)], now=0.0).tolist()
+    # Ordem das detecções invertida: a associação é por posição, não por índice
+    ids = tracker.update([box(305, 102), box(104, 98)], now=0.1)
+    assert ids.tolist() == [b, a]
+
+
+def test_velocity_is_stable_with_sparse_updates(assignment):
+    # 60 px/s observados a 3 Hz (como entre inferências do scheduler)
+    tracker = ObjectTracker(max_distance=50.0, velocity_alpha=0.5)
+    speeds = []
+    for k in range(12):
+        now = k / 3.0
+        tracker.update([box(100 + 60 * now, 100)], now=now)
+        speeds.append(float(tracker.velocities[0, 0]))
+    assert speeds[-1] == pytest.approx(60.0, rel=0.01)
+    assert max(speeds[6:]) - min(speeds[6:]) < 2.0
+
+
+def test_far_detection_opens_new_track(assignment):
+    tracker = ObjectTracker(max_distance=50.0)
+    tracker.update([box(0, 0)], now=0.0)
+    ids = tracker.update([box(400, 400)], now=0.1)
+    assert ids.tolist() == [1]
+
+
+def test_stale_tracks_expire_and_are_reported():
+    tracker = ObjectTracker(max_age=1.0)
+    tracker.update([box(0, 0), box(200, 200)], now=0.0)
+    tracker.update([box(2, 0)], now=0.9)
+    tracker.update([box(4, 0)], now=1.5)
+    assert tracker.ids.tolist() == [0]
+    assert tracker.pop_removed() == [1]
+    assert tracker.pop_removed() == []
+
+
+def test_track_count_is_bounded():
+    tracker = ObjectTracker(max_tracks=3)
+    for k in range(5):
+        tracker.update([box(200 * k, 0)], now=float(k))
+    assert len(tracker) == 3
+    assert sorted(tracker.pop_removed()) == [0, 1]
@@ -0,0 +1,84 @@
+from processes.presence_window import ContinuousPresence, Hysteresis, PresenceRatio
+
+
+def feed(window, samples):
+    """Alimenta (instante, presente) em ordem e retorna o resultado de cada update."""
+    return [window.update(present, now) for now, present in samples]
+
+
+def test_continuous_presence_needs_full_duration():
+    presence = ContinuousPresence(duration=2.0)
+    results = feed(presence, [(0.0, True), (1.0, True), (1.9, True), (2.0, True)])
+    assert results == [False, False, False, True]
+    assert presence.elapsed == 2.0
+
+
+def test_continuous_presence_tolerates_gaps_inside_window():
+    presence = ContinuousPresence(duration=2.0, window=3.0)
+    feed(presence, [(0.0, True), (0.5, False), (1.0, False), (1.5, True)])
+    assert presence.update(True, 2.0)
+
+
+def test_continuous_presence_expires_old_detections():
+    presence = ContinuousPresence(duration=2.0, window=2.5)
+    feed(presence, [(0.0, True), (1.0, True)])
+    # Sem detecções por mais que a janela: a contagem recomeça
+    assert not presence.update(False, 4.0)
+    assert presence.elapsed == 0.0
+    assert not presence.update(True, 4.5)
+    assert presence.update(True, 6.5)
+
+
+def test_continuous_presence_reset():
+    presence = ContinuousPresence(duration=1.0)
+    feed(presence, [(0.0, True), (1.0, True)])
+    assert presence.satisfied
+    presence.reset()
+    assert not presence.satisfied
+
+
+def test_presence_ratio_waits_for_full_window():
+    ratio = PresenceRatio(window=2.0, min_ratio=0.5)
+    results = feed(ratio, [(0.0, True), (1.0, True), (1.9, True)])
+    assert results == [False, False, False]
+    assert ratio.update(True, 2.0)
+
+
+def test_presence_ratio_counts_only_samples_in_window():
+    ratio = PresenceRatio(window=2.0, min_ratio=0.7)
+    feed(ratio, [(0.0, False), (0.5, False), (1.0, True), (1.5, True)])
+    assert not ratio.update(True, 2.0)  # Janela cheia, mas só 3 de 5 amostras
+    assert ratio.ratio == 0.6
+    # Em 2.6 as amostras de 0.0 e 0.5 saem da janela
+    assert ratio.update(False, 2.6)
+    assert ratio.ratio == 0.75
+
+
+def test_presence_ratio_reset():
+    ratio = PresenceRatio(window=1.0, min_ratio=0.5)
+    feed(ratio, [(0.0, True), (1.0, True)])
+    ratio.reset()
+    assert ratio.ratio == 0.0
+    assert not ratio.update(True, 5.0)  # A janela recomeça a partir da próxima amostra
+
+
+def test_hysteresis_switches_only_after_hold_times():
+    state = Hysteresis(on_time=1.0, off_time=2.0)
+    assert feed(state, [(0.0, True), (0.5, True), (1.0, True)]) == [False, False, True]
+    assert state.state
+    assert feed(state, [(1.5, False), (3.0, False), (3.5, False)]) == [False, False, True]
+    assert not state.state
+
+
+def test_hysteresis_ignores_short_flickers():
+    state = Hysteresis(on_time=1.0)
+    feed(state, [(0.0, True), (0.8, False), (1.2, True), (2.0, True)])
+    assert not state.state  # A presença recomeçou em 1.2
+    assert state.update(True, 2.2)
+
+
+def test_hysteresis_reset():
+    state = Hysteresis(on_time=1.0, state=True)
+    state.update(False, 0.0)
+    state.reset()
+    assert not state.state and state.since is None
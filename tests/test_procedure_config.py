@@ -0,0 +1,138 @@
+import copy
+import json
+import os
+import pytest
+from procedure_config.procedure_config import (
+    ProcedureConfig,
+    ProcedureConfigError,
+    STEP_TYPES,
+)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TIMEOUTS = {key: 10 for _, _, _, keys, _ in STEP_TYPES.values() for key in keys}
+REQUIRED_TIMES = {key: 5 for *_, keys in STEP_TYPES.values() for key in keys}
+INFERENCE_RATES = {"spectingPalletClass": {"idle": 2, "active": 10}}
+
+PROCEDURE = {
+    "nome": "teste",
+    "info": [
+        {"expected_macacao_color": "macacao_azul"},
+        {"expected_pallet_color": "laranja"},
+        {"expected_pallet_class": "pallet_coberto"},
+    ],
+    "ordem": "[self.startTracker, self.palletTracker, self.pacoteTracker]",
+    "db_command_etapas": "[self.startTracker.statusPassoStart, self.palletTracker.statusPassoCollor, None]",
+    "db_command_alertas": "self.startTracker.alertPassoStart + self.palletTracker.alertPassoCollor",
+}
+
+
+def config_with(*procedures, **overrides):
+    data = {
+        "timeouts": [TIMEOUTS],
+        "required_times": [REQUIRED_TIMES],
+        "inference_rates": [INFERENCE_RATES],
+        "procedimentos": list(procedures),
+    }
+    data.update(overrides)
+    return ProcedureConfig(data)
+
+
+def procedure(**fields):
+    result = copy.deepcopy(PROCEDURE)
+    result.update(fields)
+    return result
+
+
+def test_repository_procedures_compile():
+    with open(os.path.join(REPO_DIR, "procedimentos.json"), "r", encoding="utf-8") as arquivo:
+        config = ProcedureConfig(json.load(arquivo))
+    assert config.plans
+    for plan in config.plans.values():
+        assert plan.steps
+
+
+def test_compiles_steps_and_parameters():
+    plan = config_with(procedure()).get("teste")
+    assert plan.step_names == ["StartTracker", "PalletTracker", "PacoteTracker"]
+    assert plan.expected_pallet_color == "laranja"
+    assert plan.steps[1].timeouts == {"spectingPalletColor": 10, "spectingPalletClass": 10}
+    assert plan.steps[1].video_path_var == "VIDEO_PATH_PALLET"
+    assert plan.steps[1].model == "rede2"
+    assert plan.steps[1].required_times == {"spectingPalletColor": 5, "spectingPalletClass": 5}
+    assert plan.steps[1].inference_rates == {"idle": 2, "active": 10}
+    assert plan.steps[0].inference_rates is None
+
+
+def test_standalone_step():
+    step = config_with().step("PacotePolpaTracker")
+    assert step.timeouts == {"spectingPacotes": 10}
+    assert step.required_times == {"presença_polpa": 5, "ausencia_polpa": 5}
+    with pytest.raises(ProcedureConfigError, match="Tracker desconhecido"):
+        config_with().step("FooTracker")
+
+
+def test_polpa_procedures_use_pacote_polpa_step():
+    plan = config_with(procedure(nome="teste_polpa")).get("teste_polpa")
+    assert plan.step_names == ["StartTracker", "PalletTracker", "PacotePolpaTracker"]
+
+
+def test_collect_etapas_and_alertas():
+    plan = config_with(procedure()).get("teste")
+    results = {"StartTracker": {"statusPassoStart": True, "alertPassoStart": "a; "}}
+    # PalletTracker não executado: etapa None e alerta vazio
+    assert plan.collect_etapas(results) == [True, None, None]
+    assert plan.collect_alertas(results) == "a; "
+
+
+@pytest.mark.parametrize(
+    "fields, message",
+    [
+        ({"ordem": "[self.startTracker, self.fooTracker]"}, "Tracker desconhecido"),
+        ({"ordem": "[]"}, "não contém passos"),
+        ({"ordem": "[self.startTracker()]"}, "Passo mal formado"),
+        ({"db_command_etapas": "[self.startTracker.naoExiste]"}, "não possui o resultado"),
+        ({"db_command_alertas": "startTracker.alertPassoStart"}, "mal formado"),
+        ({"nome": ""}, "sem nome"),
+    ],
+)
+def test_invalid_procedure_raises(fields, message):
+    with pytest.raises(ProcedureConfigError, match=message):
+        config_with(procedure(**fields))
+
+
+@pytest.mark.parametrize("missing", ["info", "ordem", "db_command_etapas", "db_command_alertas"])
+def test_missing_procedure_field_raises(missing):
+    broken = procedure()
+    del broken[missing]
+    with pytest.raises(ProcedureConfigError, match="Campo obrigatório ausente"):
+        config_with(broken)
+
+
+def test_missing_info_parameter_raises():
+    with pytest.raises(ProcedureConfigError, match="expected_pallet_class"):
+        config_with(procedure(info=[{"expected_macacao_color": "x"}, {"expected_pallet_color": "y"}]))
+
+
+def test_missing_timeout_raises():
+    timeouts = dict(TIMEOUTS)
+    del timeouts["spectingPalletColor"]
+    with pytest.raises(ProcedureConfigError, match="spectingPalletColor"):
+        config_with(procedure(), timeouts=[timeouts])
+
+
+def test_missing_required_time_raises():
+    required_times = dict(REQUIRED_TIMES)
+    del required_times["ausencia_polpa"]
+    with pytest.raises(ProcedureConfigError, match="ausencia_polpa"):
+        config_with(procedure(nome="teste_polpa"), required_times=[required_times])
+
+
+def test_missing_section_raises():
+    with pytest.raises(ProcedureConfigError, match="Seção obrigatória ausente"):
+        ProcedureConfig({"procedimentos": []})
+
+
+def test_duplicate_procedure_raises():
+    with pytest.raises(ProcedureConfigError, match="duplicado"):
+        config_with(procedure(), procedure())
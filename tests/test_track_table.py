@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from processes.track_table import TrackTable
+
+COLUMNS = {"last_seen": (np.float64, (), np.nan), "count": (np.int64, (), 0)}
+
+
+def full_table():
+    table = TrackTable(3, COLUMNS)
+    slots = table.add([1, 2, 3])
+    table["last_seen"][slots] = [1.0, 2.0, 3.0]
+    table["count"][slots] = [10, 20, 30]
+    return table
+
+
+def test_add_assigns_slots_and_fill_values():
+    table = TrackTable(4, COLUMNS)
+    slots = table.add([7, 8])
+    assert list(slots) == [0, 1]
+    assert list(table.slots([8, 7, 9])) == [1, 0, -1]
+    assert len(table) == 2 and 7 in table
+    assert np.isnan(table["last_seen"][slots]).all()
+
+
+def test_remove_frees_slot_for_reuse():
+    table = full_table()
+    table.remove([2])
+    assert 2 not in table
+    slots = table.add([4])
+    assert list(slots) == [1]
+    assert table["count"][1] == 0
+
+
+def test_full_table_evicts_oldest():
+    table = full_table()
+    slots = table.add([4])
+    assert list(slots) == [0]
+    assert sorted(table.ids.tolist()) == [2, 3, 4]
+
+
+def test_multiple_evictions_in_one_call_use_distinct_slots():
+    table = full_table()
+    slots = table.add([4, 5])
+    assert sorted(slots.tolist()) == [0, 1]
+    assert sorted(table.ids.tolist()) == [3, 4, 5]
+    assert 4 in table and 5 in table and 3 in table
+    assert table["count"][slots].tolist() == [0, 0]
+
+
+def test_evicting_more_than_capacity_keeps_last_ids():
+    table = full_table()
+    slots = table.add([4, 5, 6])
+    assert len(set(slots.tolist())) == 3
+    assert sorted(table.ids.tolist()) == [4, 5, 6]
+
+
+def test_more_ids_than_capacity_raises():
+    table = full_table()
+    with pytest.raises(ValueError):
+        table.add([4, 5, 6, 7])
+    assert sorted(table.ids.tolist()) == [1, 2, 3]
+
+
+def test_existing_and_duplicate_ids_keep_their_slot():
+    table = TrackTable(3, COLUMNS)
+    first = table.add([7])
+    slots = table.add([7, 8, 8])
+    assert slots.tolist() == [first[0], 1, 1]
+    assert len(table) == 2 and len(table._free) == 1
@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+from video_config.video_capture_v2 import VideoCapture
+
+
+class CameraManager:
+    """
+    Mantém um decodificador ffmpeg de longa duração por URL de câmera.
+    Trocar de tracker apenas muda qual stream alimenta o callback, sem
+    novo handshake RTSP, espera de keyframe ou spawn de subprocesso.
+
+    Os decodificadores são compartilhados pelo processo inteiro: cada sessão
+    de procedimento tem seu próprio CameraManager (loop consumidor e câmera
+    ativa), mas todas reutilizam as mesmas conexões. Cada decodificador
+    alimenta uma única sessão por vez: o frame entregue é uma view do ring
+    do decodificador, válida só até a próxima leitura de quem o recebeu.
+    """
+
+    _decoders = {}  # {url: VideoCapture}
+    _consumers = {}  # {url: quantidade de sessões com a câmera ativa}
+    _lock = threading.Lock()
+
+    def __init__(self, frame_callback=None, frame_width=640, frame_height=640):
+        self.frame_callback = frame_callback
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.running = False
+        self._active_url = None
+        self.stats_interval = 60.0
+        self._last_stats_time = time.time()
+
+    def get_decoder(self, url):
+        """Retorna o decodificador da URL, abrindo-o na primeira vez (lazy)."""
+        with self._lock:
+            decoder = self._decoders.get(url)
+            if decoder is None:
+                print(f"[CameraManager] Abrindo decodificador: {url}")
+                decoder = VideoCapture(url)
+                decoder.pause()
+                self._decoders[url] = decoder
+            decoder.open(self.frame_width, self.frame_height)
+            return decoder
+
+    def preload(self, urls):
+        """Abre antecipadamente um decodificador por URL distinta."""
+        for url in set(u for u in urls if u):
+            self.get_decoder(url)
+
+    def switch(self, url):
+        """Define qual câmera alimenta o callback. Custa no máximo um intervalo de frame."""
+        if url == self._active_url:
+            return
+
+        decoder = self.get_decoder(url)
+        with self._lock:
+            if self._consumers.get(url, 0):
+                # Outra sessão lendo do mesmo ring liberaria o slot do frame ainda em uso aqui
+                raise RuntimeError(f"[CameraManager] Câmera {url} já está em uso por outra sessão.")
+        self.detach()
+        with self._lock:
+            decoder.resume()
+            self._consumers[url] = 1
+        self._active_url = url
+        print(f"[CameraManager] Câmera ativa: {url}")
+
+    def detach(self):
+        """Libera a câmera ativa desta instância, pausando o decodificador se ninguém mais o usa."""
+        url = self._active_url
+        if url is None:
+            return
+
+        with self._lock:
+            consumers = self._consumers.get(url, 1) - 1
+            self._consumers[url] = max(consumers, 0)
+            decoder = self._decoders.get(url)
+            if consumers <= 0 and decoder is not None:
+                decoder.pause()
+        self._active_url = None
+
+    def start_capture(self):
+        """Loop consumidor (bloqueante): entrega os frames da câmera ativa ao callback."""
+        self.running = True
+        while self.running:
+            decoder = self._decoders.get(self._active_url)
+            if decoder is None:
+                time.sleep(0.05)
+                continue
+
+            try:
+                frame = decoder.read(timeout=2.0)
+            except queue.Empty:
+                if not decoder.is_alive():
+                    print("[CameraManager] Decodificador parado, reabrindo...")
+                    decoder.open(self.frame_width, self.frame_height)
+                continue
+
+            if self.frame_callback:
+                self.frame_callback(frame)
+
+            # Monitoramento de saúde
+            now = time.time()
+            if now - decoder.last_frame_time > 5.0:
+                print("[WARN] No frames received for 5 seconds!")
+            if now - self._last_stats_time > self.stats_interval:
+                self._last_stats_time = now
+                print(f"[CameraManager] Frames por câmera: {self.stats()}")
+
+    @classmethod
+    def stats(cls):
+        """Contadores de frames descartados/processados por URL."""
+        return {url: decoder.stats() for url, decoder in cls._decoders.items()}
+
+    def stop_capture(self):
+        """Encerra o loop consumidor e libera a câmera, mantendo os decodificadores abertos."""
+        self.running = False
+        self.detach()
+
+    @classmethod
+    def close_all(cls):
+        """Encerra todos os decodificadores do processo."""
+        with cls._lock:
+            for decoder in cls._decoders.values():
+                decoder.stop_capture()
+            cls._decoders.clear()
+            cls._consumers.clear()
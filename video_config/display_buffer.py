@@ -0,0 +1,49 @@
+import cv2
+import itertools
+import os
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class DisplayBuffer:
+    """
+    Buffer de exibição de capacidade fixa (latest-N).
+    Guarda apenas os N frames processados mais recentes, opcionalmente
+    reduzidos para DISPLAY_MAX_WIDTH, de modo que a memória fica limitada
+    pela configuração mesmo quando ninguém está assistindo ao stream.
+    Escrita e leitura usam operações atômicas de deque, sem lock.
+    """
+
+    def __init__(self, capacity=None, max_width=None):
+        self.capacity = capacity or int(os.getenv("DISPLAY_BUFFER_SIZE", "2"))
+        if max_width is None:
+            max_width = int(os.getenv("DISPLAY_MAX_WIDTH", "0"))
+        self.max_width = max_width or None
+
+        self._frames = deque(maxlen=self.capacity)  # [(seq, frame)]
+        self._seq = itertools.count(1)
+
+    def put(self, frame):
+        """Adiciona um frame, descartando o mais antigo se o buffer estiver cheio. Retorna o seq."""
+        if self.max_width and frame.shape[1] > self.max_width:
+            height = int(frame.shape[0] * self.max_width / frame.shape[1])
+            frame = cv2.resize(frame, (self.max_width, height), interpolation=cv2.INTER_AREA)
+
+        seq = next(self._seq)
+        self._frames.append((seq, frame))
+        return seq
+
+    def latest(self):
+        """Retorna (seq, frame) do frame mais recente, ou (0, None) se vazio."""
+        try:
+            return self._frames[-1]
+        except IndexError:
+            return 0, None
+
+    def nbytes(self):
+        return sum(frame.nbytes for _, frame in list(self._frames))
+
+    def __len__(self):
+        return len(self._frames)
@@ -0,0 +1,33 @@
+import time
+import numpy as np
+
+
+class StampedFrame(np.ndarray):
+    """
+    Frame (view numpy, sem cópia) com o instante de captura e o número de
+    sequência atribuídos pela captura. `timestamp` está no relógio
+    monotônico da captura (ou no tempo do vídeo, para arquivos); só
+    diferenças entre timestamps têm significado.
+    """
+
+    timestamp = None
+    seq = None
+
+    @classmethod
+    def wrap(cls, array, timestamp, seq):
+        frame = array.view(cls)
+        frame.timestamp = timestamp
+        frame.seq = seq
+        return frame
+
+    def __array_finalize__(self, obj):
+        # Cópias e recortes herdam o carimbo do frame de origem
+        if obj is not None:
+            self.timestamp = getattr(obj, "timestamp", None)
+            self.seq = getattr(obj, "seq", None)
+
+
+def frame_time(frame):
+    """Instante de captura do frame; para frames sem carimbo, o relógio monotônico atual."""
+    timestamp = getattr(frame, "timestamp", None)
+    return time.monotonic() if timestamp is None else timestamp
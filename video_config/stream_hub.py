@@ -0,0 +1,138 @@
+import cv2
+import threading
+import time
+import os
+from dotenv import load_dotenv
+from video_config.display_buffer import DisplayBuffer
+
+load_dotenv()
+
+
+class StreamHub:
+    """
+    Hub de broadcast para o streaming MJPEG.
+    Guarda os frames processados em um DisplayBuffer limitado; cada frame é codificado
+    em JPEG no máximo uma vez por tier (sob demanda, na thread do cliente)
+    e o resultado é compartilhado por todos os assinantes. Cada cliente lê
+    no seu próprio ritmo, limitado por um teto de FPS, sem roubar frames
+    dos demais nem atrasar a inferência.
+
+    Há um hub por doca (`for_dock`), compartilhado pelas sessões que a usam
+    e pelos clientes do /video_feed?doca=<doca>.
+    """
+
+    DEFAULT_DOCK = "default"
+
+    _hubs = {}  # {doca: StreamHub}
+    _hubs_lock = threading.Lock()
+
+    # tier: (largura máxima em px ou None para o tamanho original, qualidade JPEG)
+    DEFAULT_TIERS = {
+        "high": (None, 95),
+        "medium": (480, 75),
+        "low": (320, 60),
+    }
+
+    def __init__(self, tiers=None, max_fps=None, buffer=None):
+        self.buffer = buffer or DisplayBuffer()
+        self.tiers = tiers or dict(self.DEFAULT_TIERS)
+        self.max_fps = max_fps or float(os.getenv("STREAM_MAX_FPS", "15"))
+
+        self.subscribers = 0
+        self.frames_published = 0
+        self.frames_encoded = 0
+
+        self._cond = threading.Condition()  # Apenas para acordar assinantes
+        self._encoded = {}  # {tier: (seq, jpeg_bytes)}
+        self._encode_locks = {tier: threading.Lock() for tier in self.tiers}
+
+    @classmethod
+    def for_dock(cls, dock=None):
+        """Hub da doca (criado no primeiro uso); sem doca, o hub padrão."""
+        dock = cls.DEFAULT_DOCK if dock is None else str(dock)
+        with cls._hubs_lock:
+            hub = cls._hubs.get(dock)
+            if hub is None:
+                hub = cls._hubs[dock] = cls()
+            return hub
+
+    def publish(self, frame):
+        """Publica um frame processado (não codifica; sem lock quando não há assinantes)."""
+        self.buffer.put(frame)
+        self.frames_published += 1
+        if self.subscribers:
+            with self._cond:
+                self._cond.notify_all()
+
+    def _encode(self, tier, seq, frame):
+        """Retorna o JPEG do frame `seq` no tier, codificando-o apenas se ninguém o fez ainda."""
+        cached = self._encoded.get(tier)
+        if cached is not None and cached[0] >= seq:
+            return cached[1]
+
+        with self._encode_locks[tier]:
+            cached = self._encoded.get(tier)
+            if cached is not None and cached[0] >= seq:
+                return cached[1]
+
+            max_width, quality = self.tiers[tier]
+            image = frame
+            if max_width and frame.shape[1] > max_width:
+                height = int(frame.shape[0] * max_width / frame.shape[1])
+                image = cv2.resize(frame, (max_width, height), interpolation=cv2.INTER_AREA)
+
+            ret, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ret:
+                return None
+            data = jpeg.tobytes()
+            self._encoded[tier] = (seq, data)
+            self.frames_encoded += 1
+            return data
+
+    def subscribe(self, fps=None, tier="high"):
+        """
+        Gerador de frames JPEG para um cliente. Entrega sempre o frame mais
+        recente, no máximo `fps` quadros por segundo (entre 1 e STREAM_MAX_FPS).
+        """
+        if tier not in self.tiers:
+            tier = "high"
+        fps = min(max(fps, 1.0), self.max_fps) if fps else self.max_fps
+        interval = 1.0 / fps if fps > 0 else 0.0
+
+        with self._cond:
+            self.subscribers += 1
+        try:
+            last_seq = 0
+            next_time = 0.0
+            while True:
+                wait = next_time - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+
+                with self._cond:
+                    seq, frame = self.buffer.latest()
+                    if seq == last_seq:
+                        self._cond.wait(timeout=1.0)
+                        seq, frame = self.buffer.latest()
+                if seq == last_seq or frame is None:
+                    continue
+
+                data = self._encode(tier, seq, frame)
+                last_seq = seq
+                next_time = time.monotonic() + interval
+                if data:
+                    yield data
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def has_subscribers(self):
+        return self.subscribers > 0
+
+    def stats(self):
+        return {
+            "subscribers": self.subscribers,
+            "published": self.frames_published,
+            "encoded": self.frames_encoded,
+            "buffered_bytes": self.buffer.nbytes(),
+        }
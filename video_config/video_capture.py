@@ -1,4 +1,5 @@
 import cv2
+from video_config.stamped_frame import StampedFrame
 
 class VideoCapture:
     def __init__(self, video_path, frame_callback=None):
@@ -9,13 +10,42 @@ class VideoCapture:
         if not self.cap.isOpened():
             raise ValueError(f"Erro ao abrir o vídeo: {self.video_path}")
 
+        # Período nominal, usado quando o container não informa a posição do frame
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_period = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+        self.seq = 0
+        self.timestamp = None
+
+    def read(self):
+        """
+        Lê o próximo frame carimbado com o tempo do vídeo (segundos desde o
+        início) e o número de sequência; None ao fim do arquivo. Assim os
+        trackers decidem pelo tempo do vídeo, qualquer que seja a velocidade
+        de leitura.
+        """
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        position = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if self.timestamp is not None and position <= self.timestamp:
+            position = self.timestamp + self.frame_period
+        self.timestamp = position
+        self.seq += 1
+        return StampedFrame.wrap(frame, self.timestamp, self.seq)
+
+    def seek(self, seconds):
+        """Posiciona a leitura em `seconds` do vídeo (ex.: troca de câmera durante um replay)."""
+        if seconds > 0:
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000.0)
+        self.timestamp = None
+
     def start_capture(self):
         """
         Starts capturing frames from the video and emits them using the callback.
         """
         while self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
+            frame = self.read()
+            if frame is None:
                 break
 
             if self.frame_callback:
@@ -25,4 +55,4 @@ class VideoCapture:
         cv2.destroyAllWindows()
 
     def stop_capture(self):
-        self.cap.release()
\ No newline at end of file
+        self.cap.release()
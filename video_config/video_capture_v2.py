@@ -1,29 +1,175 @@
+import itertools
 import subprocess
 import numpy as np
 import queue
 import threading
+import select
 import time
 import os
+from collections import deque
 from dotenv import load_dotenv
+from video_config.stamped_frame import StampedFrame
 
 load_dotenv()
 
+
+class FrameRingBuffer:
+    """
+    Pool fixo de N frames pré-alocados (um único bloco numpy).
+    O leitor do ffmpeg escreve direto em um slot livre via readinto e
+    entrega ao consumidor apenas o índice/view; o slot volta ao pool
+    quando é liberado. Cada slot guarda também o instante de captura e o
+    número de sequência do frame que contém.
+    """
+
+    def __init__(self, size, frame_height, frame_width, channels=3):
+        self.frames = np.empty((size, frame_height, frame_width, channels), dtype=np.uint8)
+        self.timestamps = np.zeros(size, dtype=np.float64)
+        self.seqs = np.zeros(size, dtype=np.int64)
+        self._buffers = [memoryview(frame).cast("B") for frame in self.frames]
+        self._free = deque(range(size))
+
+    def acquire(self):
+        """Retorna um slot livre ou None se todos estiverem em uso."""
+        try:
+            return self._free.popleft()
+        except IndexError:
+            return None
+
+    def release(self, slot):
+        self._free.append(slot)
+
+    def stamp(self, slot, timestamp, seq):
+        self.timestamps[slot] = timestamp
+        self.seqs[slot] = seq
+
+    def view(self, slot):
+        """Frame do slot (sem cópia), com seu instante de captura e sequência."""
+        return StampedFrame.wrap(
+            self.frames[slot], float(self.timestamps[slot]), int(self.seqs[slot])
+        )
+
+    def buffer(self, slot):
+        """memoryview gravável (bytes) do slot, para readinto."""
+        return self._buffers[slot]
+
+
+class LatestFrameBuffer:
+    """
+    Buffer de slot único (latest-frame-wins): o produtor sobrescreve o frame
+    ainda não consumido e o consumidor sempre recebe o mais recente.
+    Frames mais velhos que `max_frame_age` segundos são descartados na leitura.
+    """
+
+    def __init__(self, max_frame_age=None, on_discard=None):
+        self.max_frame_age = max_frame_age
+        self.on_discard = on_discard  # Chamado com cada item descartado sem ser consumido
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = 0.0
+        self._seq = 0
+        self._consumed_seq = 0
+
+    def put(self, frame, timestamp=None):
+        with self._cond:
+            if self._frame is not None and self._seq != self._consumed_seq:
+                self.frames_dropped += 1  # Frame anterior nunca foi consumido
+                self._discard(self._frame)
+            self._frame = frame
+            self._timestamp = time.monotonic() if timestamp is None else timestamp
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Retorna o frame mais recente ainda não consumido (levanta queue.Empty no timeout)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._frame is not None and self._seq != self._consumed_seq:
+                    self._consumed_seq = self._seq
+                    age = time.monotonic() - self._timestamp
+                    if self.max_frame_age and age > self.max_frame_age:
+                        self.frames_dropped += 1
+                        self._discard(self._frame)
+                        self._frame = None
+                        continue
+                    self.frames_processed += 1
+                    return self._frame
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(remaining)
+
+    def clear(self):
+        with self._cond:
+            if self._frame is not None and self._seq != self._consumed_seq:
+                self._discard(self._frame)
+            self._frame = None
+            self._consumed_seq = self._seq
+
+    def _discard(self, frame):
+        if self.on_discard is not None:
+            self.on_discard(frame)
+
+    def qsize(self):
+        return int(self._frame is not None and self._seq != self._consumed_seq)
+
+
 class VideoCapture:
-    def __init__(self, rtsp_url, frame_callback=None, ffmpeg_path=None):
+    def __init__(
+        self,
+        rtsp_url,
+        frame_callback=None,
+        ffmpeg_path=None,
+        latest_only=None,
+        max_frame_age=None,
+    ):
         self.rtsp_url = rtsp_url
         self.frame_callback = frame_callback
         self.ffmpeg_path = ffmpeg_path or os.getenv('FFMPEG_PATH')
-        self.frame_queue = queue.Queue(maxsize=100)  # Buffer maior
+
+        # CAPTURE_MODE=latest: processa sempre o frame mais novo (descarta o backlog)
+        # CAPTURE_MODE=queue: fila FIFO de 100 frames (comportamento antigo)
+        if latest_only is None:
+            latest_only = os.getenv("CAPTURE_MODE", "latest").lower() == "latest"
+        if max_frame_age is None:
+            max_frame_age = float(os.getenv("MAX_FRAME_AGE", "1.0"))
+        self.latest_only = latest_only
+
+        if self.latest_only:
+            self.frame_queue = LatestFrameBuffer(max_frame_age, on_discard=self._release_slot)
+        else:
+            self.frame_queue = queue.Queue(maxsize=100)  # Buffer maior
+        self.frames_dropped = 0  # Descartes no leitor (fila/ring cheios)
+        self.frames_processed = 0
+
+        # Ring de frames pré-alocados: a fila transporta apenas índices de slot
+        self.ring_size = int(os.getenv("FRAME_RING_SIZE", 4 if self.latest_only else 32))
+        self.ring = None
+        self._scratch = None  # Destino das leituras descartadas (pausado/ring cheio)
+        self._held_slot = None  # Slot entregue ao consumidor na última leitura
+        self._seq = itertools.count(1)  # Sequência dos frames entregues ao ring
         self.capture_thread = None
         self.running = False
         self.last_frame_time = 0
         self.frame_size = None
+        self.process = None
+        self.paused = False
+
+    def open(self, frame_width=640, frame_height=640):
+        """Inicia apenas a thread de decodificação (não bloqueante). Idempotente."""
+        if self.capture_thread is not None and self.capture_thread.is_alive():
+            return
 
-    def start_capture(self, frame_width=640, frame_height=640):
-        """Inicia a captura com proteção contra falhas"""
         self.frame_size = frame_width * frame_height * 3
+        if self.ring is None or self.ring.frames.shape[1:3] != (frame_height, frame_width):
+            self.ring = FrameRingBuffer(self.ring_size, frame_height, frame_width)
+            self._scratch = FrameRingBuffer(1, frame_height, frame_width).buffer(0)
         self.running = True
-        
+
         # Thread de captura com restart automático
         def _capture_worker():
             while self.running:
@@ -39,10 +185,69 @@ class VideoCapture:
         )
         self.capture_thread.start()
 
+    def read(self, timeout=2.0):
+        """
+        Retorna o próximo frame decodificado (levanta queue.Empty no timeout).
+        O frame é uma view do ring pré-alocado (StampedFrame, com `timestamp`
+        de captura e `seq`) e só é válido até a próxima chamada de
+        read()/release(); quem precisar guardá-lo deve copiá-lo.
+        """
+        self.release()
+        slot = self.frame_queue.get(timeout=timeout)
+        if not self.latest_only:
+            self.frames_processed += 1
+        self._held_slot = slot
+        return self.ring.view(slot)
+
+    def release(self):
+        """Devolve ao ring o frame entregue na última leitura."""
+        if self._held_slot is not None:
+            self._release_slot(self._held_slot)
+            self._held_slot = None
+
+    def _release_slot(self, slot):
+        self.ring.release(slot)
+
+    def stats(self):
+        """Contadores de frames descartados vs. processados."""
+        if self.latest_only:
+            dropped = self.frames_dropped + self.frame_queue.frames_dropped
+            processed = self.frame_queue.frames_processed
+        else:
+            dropped, processed = self.frames_dropped, self.frames_processed
+        return {"dropped": dropped, "processed": processed}
+
+    def is_alive(self):
+        return self.capture_thread is not None and self.capture_thread.is_alive()
+
+    def pause(self):
+        """Mantém a conexão RTSP aberta, mas descarta os frames decodificados."""
+        self.paused = True
+
+    def resume(self):
+        """Volta a entregar frames, descartando os que ficaram no buffer."""
+        self.flush()
+        self.paused = False
+
+    def flush(self):
+        if self.latest_only:
+            self.frame_queue.clear()
+            return
+
+        while True:
+            try:
+                self._release_slot(self.frame_queue.get_nowait())
+            except queue.Empty:
+                break
+
+    def start_capture(self, frame_width=640, frame_height=640):
+        """Inicia a captura com proteção contra falhas"""
+        self.open(frame_width, frame_height)
+
         # Consumidor principal
         while self.running:
             try:
-                frame = self.frame_queue.get(timeout=2.0)
+                frame = self.read(timeout=2.0)
                 if self.frame_callback:
                     self.frame_callback(frame)
                     
@@ -51,7 +256,7 @@ class VideoCapture:
                     print("[WARN] No frames received for 5 seconds!")
                     
             except queue.Empty:
-                if not self.capture_thread.is_alive():
+                if not self.is_alive():
                     print("[ERROR] Capture thread died!")
                     break
 
@@ -76,11 +281,12 @@ class VideoCapture:
         if os.name == 'nt':
             creationflags = subprocess.CREATE_NO_WINDOW
 
+        # bufsize=0: stdout sem buffer intermediário, o readinto copia do pipe direto para o ring
         self.process = subprocess.Popen(
             command,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            bufsize=self.frame_size * 5,
+            bufsize=0,
             creationflags=creationflags
         )
 
@@ -93,22 +299,43 @@ class VideoCapture:
 
         threading.Thread(target=_read_stderr, daemon=True).start()
 
+        # Poller criado uma única vez por processo ffmpeg (não por frame)
+        poller = None
+        if hasattr(select, 'poll'):
+            poller = select.poll()
+            poller.register(self.process.stdout, select.POLLIN)
+
         # Leitura principal de frames
         while self.running:
             try:
-                raw_frame = self._read_with_timeout(self.process.stdout, self.frame_size, timeout=5.0)
-                if not raw_frame or len(raw_frame) != self.frame_size:
-                    print("[ERROR] Invalid frame size")
-                    break
+                slot = None if self.paused else self.ring.acquire()
+                if slot is None:
+                    # Pausado ou ring cheio: drena o pipe sem entregar o frame
+                    self._read_into(self.process.stdout, self._scratch, poller, timeout=5.0)
+                    self.last_frame_time = time.time()
+                    if not self.paused:
+                        self.frames_dropped += 1
+                    continue
+
+                try:
+                    self._read_into(self.process.stdout, self.ring.buffer(slot), poller, timeout=5.0)
+                except Exception:
+                    self._release_slot(slot)
+                    raise
 
-                frame = np.frombuffer(raw_frame, dtype=np.uint8)
-                frame = frame.reshape((frame_height, frame_width, 3))
-                
                 self.last_frame_time = time.time()
+                # Carimbo de captura: instante em que o frame terminou de chegar do ffmpeg
+                captured_at = time.monotonic()
+                self.ring.stamp(slot, captured_at, next(self._seq))
+                if self.latest_only:
+                    self.frame_queue.put(slot, captured_at)
+                    continue
                 try:
-                    self.frame_queue.put(frame, timeout=0.1)
+                    self.frame_queue.put(slot, timeout=0.1)
                     print(f"[Frame Captured] Queue: {self.frame_queue.qsize()}\n")
                 except queue.Full:
+                    self._release_slot(slot)
+                    self.frames_dropped += 1
                     print("[WARN] Frame queue full - dropping frame")
                     continue
 
@@ -118,30 +345,19 @@ class VideoCapture:
 
         self._cleanup()
 
-    def _read_with_timeout(self, pipe, size, timeout):
-        """Leitura com timeout para evitar bloqueios"""
-        from functools import partial
-        import select
-        
-        # Linux/Mac
-        if hasattr(select, 'poll'):
-            poller = select.poll()
-            poller.register(pipe, select.POLLIN)
-            
-            if not poller.poll(timeout * 1000):
+    def _read_into(self, pipe, buffer, poller, timeout):
+        """Preenche `buffer` (memoryview) com um frame completo, com timeout para evitar bloqueios"""
+        filled = 0
+        size = len(buffer)
+        while filled < size:
+            # Linux/Mac: espera dados com timeout. No Windows (sem poll) a leitura é bloqueante.
+            if poller is not None and not poller.poll(timeout * 1000):
                 raise TimeoutError("FFmpeg read timeout")
-                
-            return pipe.read(size)
-        
-        # Windows
-        else:
-            import win32file
-            handle = win32file._get_osfhandle(pipe.fileno())
-            while True:
-                res = win32file.ReadFile(handle, size)
-                if res[0] == 0:
-                    return res[1]
-                time.sleep(0.1)
+
+            n = pipe.readinto(buffer[filled:])
+            if not n:
+                raise EOFError("Invalid frame size")
+            filled += n
 
     def _cleanup(self):
         """Limpeza garantida"""